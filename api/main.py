@@ -610,8 +610,7 @@ async def upload_pdf(
             )
 
             session.add(inv)
-            session.commit()
-            session.refresh(inv)
+            session.flush()  # assigns inv.id; committed once after the loop
 
             for line in lines:
                 il = InvoiceLine(
@@ -629,9 +628,6 @@ async def upload_pdf(
                 )
                 session.add(il)
 
-            session.commit()
-            session.refresh(inv)
-
             created_invoices.append(
                 UploadedInvoiceSummary(
                     invoice_id=inv.id,
@@ -643,6 +639,9 @@ async def upload_pdf(
                 )
             )
 
+        # One commit for every invoice in the upload
+        session.commit()
+
     else:
         # Process as bulk supplier PDF
         os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -694,8 +693,7 @@ async def upload_pdf(
                         dms_vendor_code=None,
                     )
                     session.add(supplier)
-                    session.commit()
-                    session.refresh(supplier)
+                    session.flush()
 
             if not supplier:
                 # Skip invoices without supplier (but log it)
@@ -759,8 +757,7 @@ async def upload_pdf(
             )
 
             session.add(inv)
-            session.commit()
-            session.refresh(inv)
+            session.flush()  # assigns inv.id; committed once after the loop
 
             # Add line items
             for line_idx, line_item in enumerate(inv_data.line_items, start=1):
@@ -779,9 +776,6 @@ async def upload_pdf(
                 )
                 session.add(il)
 
-            session.commit()
-            session.refresh(inv)
-
             created_invoices.append(
                 UploadedInvoiceSummary(
                     invoice_id=inv.id,
@@ -793,6 +787,9 @@ async def upload_pdf(
                 )
             )
 
+        # One commit for every invoice in the upload
+        session.commit()
+
     new_count = len(created_invoices) - skipped_count
     total_detected = len(created_invoices)
     
@@ -87,9 +87,11 @@ def process_bulk_pdf(
 
     # Save individual invoice PDFs
     # Use the original PDF (not OCR'd version) for page extraction
-    # to preserve image quality
+    # to preserve image quality; without OCR that is the reader we have.
+    if processed_pdf != pdf_path:
+        reader = PyPDF2.PdfReader(str(pdf_path))
     written_paths = pipeline.save_invoices_as_pdfs(
-        pdf_path,  # Use original for page extraction
+        reader,
         invoices,
         output_dir,
     )
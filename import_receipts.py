@@ -61,6 +61,14 @@ def ensure_receipts_schema(conn: sqlite3.Connection) -> None:
         )
         """
     )
+    # Reports filter on transcode and sum qty_received per part number;
+    # covering, so those queries never touch the table rows
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_receipts_lines_transcode_part_qty
+        ON receipts_lines(transcode, part_number, qty_received)
+        """
+    )
     conn.commit()
 
 
@@ -29,27 +29,52 @@ Usage examples:
 from __future__ import annotations
 
 import argparse
+import hashlib
+import importlib.metadata
+import io
+import itertools
 import json
+import math
+import os
 import re
 import sqlite3
 import subprocess
 import sys
 import tempfile
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, suppress
 from dataclasses import dataclass
 from datetime import date
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import PyPDF2
 from dateutil import parser as date_parser
 from rich.console import Console
 from rich.table import Table
 
+try:  # optional: C-backed text extraction, much faster than PyPDF2's
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
 console = Console()
 
 
 # -------------------- Data structures -------------------- #
 
+_NON_ALNUM_RE = re.compile(r"[^A-Za-z0-9]")
+
+
+# Part numbers repeat heavily across invoices and receipts, and the reports
+# call this once per row (also as a SQLite function), so results are cached.
+# Bounded, since the API server imports this module too and runs for days.
+@lru_cache(maxsize=1 << 16)
 def normalize_part(part: str) -> str:
     """
     Canonicalize a part number for this system:
@@ -64,21 +89,12 @@ def normalize_part(part: str) -> str:
     """
     if not part:
         return ""
-    # Keep only A–Z, a–z, 0–9
-    s = re.sub(r"[^0-9A-Za-z]", "", part)
-    s = s.upper()
-
-    # Strip leading zeros
-    i = 0
-    while i < len(s) and s[i] == "0":
-        i += 1
-    s = s[i:]
-
+    # Keep only A–Z, a–z, 0–9, uppercase, strip leading zeros.
     # If it becomes empty, keep a single "0" just so we have something
-    return s or "0"
+    return _NON_ALNUM_RE.sub("", part).upper().lstrip("0") or "0"
 
 
-@dataclass
+@dataclass(slots=True)
 class LineItem:
     raw_line: str
     part_number: str
@@ -109,6 +125,21 @@ class InvoiceData:
 
 # -------------------- Helper functions -------------------- #
 
+@lru_cache(maxsize=1)
+def _year_for_hour(hour: int) -> int:
+    return date.today().year
+
+
+def _current_year() -> int:
+    """
+    date.today().year, looked up at most once per hour.
+
+    Date extraction calls this for every candidate; keying the cache on
+    the hour keeps the API server (long-running) correct across New Year.
+    """
+    return _year_for_hour(int(time.time() // 3600))
+
+
 def _normalize_year(dt):
     """
     Fix obvious OCR glitches like 2035 -> 2025.
@@ -116,13 +147,64 @@ def _normalize_year(dt):
     If the year is more than 1 year in the future but minus 10 years
     is close to the current year, assume it's a 10-year slip.
     """
-    today_year = date.today().year
+    today_year = _current_year()
     if dt.year > today_year + 1 and dt.year - 10 >= 2000:
         if abs((dt.year - 10) - today_year) <= 5:
             return dt.replace(year=dt.year - 10)
     return dt
 
 
+_ISO_DATE_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+_SLASH_DATE_RE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{2}|\d{4})")
+
+
+def _parse_simple_date(cand: str) -> Optional[date]:
+    """
+    Fast path for the shapes we see almost every time: YYYY-MM-DD and
+    MM/DD/YY(YY). Returns None for anything else so the caller can fall
+    back to dateutil (which is much slower).
+    """
+    m = _ISO_DATE_RE.fullmatch(cand)
+    if m:
+        y, mo, d = m.groups()
+    else:
+        m = _SLASH_DATE_RE.fullmatch(cand)
+        if not m:
+            return None
+        mo, d, y = m.groups()
+
+    year = int(y)
+    if len(y) == 2:
+        # Same two-digit-year window dateutil uses: within 50 years of today
+        today_year = _current_year()
+        year += today_year // 100 * 100
+        if year >= today_year + 50:
+            year -= 100
+        elif year < today_year - 50:
+            year += 100
+
+    try:
+        return date(year, int(mo), int(d))
+    except ValueError:
+        return None
+
+
+def _parse_date(cand: str, **parse_kwargs) -> Optional[str]:
+    """
+    Parse a date candidate to ISO yyyy-mm-dd (with _normalize_year applied).
+
+    Tries _parse_simple_date first and only uses dateutil for other shapes.
+    Returns None if the candidate can't be parsed.
+    """
+    try:
+        dt = _parse_simple_date(cand)
+        if dt is None:
+            dt = date_parser.parse(cand, **parse_kwargs).date()
+        return _normalize_year(dt).isoformat()
+    except Exception:
+        return None
+
+
 def _clean_invoice_token(val: str) -> str:
     """
     Clean up the raw invoice token.
@@ -150,6 +232,39 @@ def _clean_invoice_token(val: str) -> str:
 
 # -------------------- Field extraction -------------------- #
 
+# Older PartSource layouts print ref / number / date as one block.
+# Groups: (1) ref, (2) invoice number, (3) ISO date.
+_PAYMENTREF_BLOCK_RE = re.compile(
+    r'PAYMENTREF:\s*([0-9]{4,})\s+NUMBER:\s*([0-9]{4,})\s+DATE:\s*(\d{4}-\d{2}-\d{2})',
+    re.IGNORECASE,
+)
+_TERMS_BLOCK_RE = re.compile(
+    r'TERMS\s*:([0-9]{4,})\s+([0-9]{4,})\s+(\d{4}-\d{2}-\d{2})',
+    re.IGNORECASE,
+)
+_INLINE_INVOICE_BLOCK_RE = re.compile(
+    r'INVOICE\s*([0-9]{4,})\s+([0-9]{4,})\s+(\d{4}-\d{2}-\d{2})',
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=64)
+def _ref_number_date_blocks(text: str):
+    """
+    (PAYMENTREF, TERMS, inline INVOICE) matches for `text`, or None each.
+
+    extract_invoice_number and extract_invoice_date both need these (with
+    different priorities). A one-page invoice's text goes through both
+    split_into_invoices and build_invoice, so on documents of up to 64
+    pages each pattern is searched once per page.
+    """
+    return (
+        _PAYMENTREF_BLOCK_RE.search(text),
+        _TERMS_BLOCK_RE.search(text),
+        _INLINE_INVOICE_BLOCK_RE.search(text),
+    )
+
+
 def extract_invoice_number(text: str) -> Optional[str]:
     """
     Handle the variants seen so far:
@@ -165,32 +280,19 @@ def extract_invoice_number(text: str) -> Optional[str]:
     - Fallback NAPA style: 397-190218 (possibly with weird dashes / spaces)
     """
 
+    paymentref, terms, inline = _ref_number_date_blocks(text)
+
     # PaymentRef style (older PartSource pattern)
-    m = re.search(
-        r'PAYMENTREF:\s*([0-9]{4,})\s+NUMBER:\s*([0-9]{4,})\s+DATE:\s*(\d{4}-\d{2}-\d{2})',
-        text,
-        re.IGNORECASE,
-    )
-    if m:
-        return _clean_invoice_token(m.group(2))
+    if paymentref:
+        return _clean_invoice_token(paymentref.group(2))
 
     # TERMS :309068\n258537\n2025-11-08
-    m = re.search(
-        r'TERMS\s*:([0-9]{4,})\s+([0-9]{4,})\s+(\d{4}-\d{2}-\d{2})',
-        text,
-        re.IGNORECASE,
-    )
-    if m:
-        return _clean_invoice_token(m.group(2))
+    if terms:
+        return _clean_invoice_token(terms.group(2))
 
     # Inline "INVOICE309730\n258793\n2025-11-10" (older PartSource)
-    m = re.search(
-        r'INVOICE\s*([0-9]{4,})\s+([0-9]{4,})\s+(\d{4}-\d{2}-\d{2})',
-        text,
-        re.IGNORECASE,
-    )
-    if m:
-        return _clean_invoice_token(m.group(2))
+    if inline:
+        return _clean_invoice_token(inline.group(2))
 
     # "INVOICE NUMBER 397-190129" (NAPA & others)
     m = re.search(
@@ -244,62 +346,36 @@ def extract_invoice_date(text: str) -> Optional[str]:
         re.IGNORECASE,
     )
     if m:
-        cand = m.group(1).strip()
-        try:
-            dt = date_parser.parse(cand, fuzzy=True)
-            dt = _normalize_year(dt)
-            return dt.date().isoformat()
-        except Exception:
-            pass
+        iso = _parse_date(m.group(1).strip(), fuzzy=True)
+        if iso:
+            return iso
+
+    paymentref, terms, inline = _ref_number_date_blocks(text)
 
     # TERMS  :309068\n258537\n2025-11-08
-    m = re.search(
-        r'TERMS\s*:[0-9]{4,}\s+[0-9]{4,}\s+(\d{4}-\d{2}-\d{2})',
-        text,
-        re.IGNORECASE,
-    )
-    if m:
-        return m.group(1)
+    if terms:
+        return terms.group(3)
 
     # PAYMENTREF: ... DATE: 2025-11-07
-    m = re.search(
-        r'PAYMENTREF:\s*[0-9]{4,}\s+NUMBER:\s*[0-9]{4,}\s+DATE:\s*(\d{4}-\d{2}-\d{2})',
-        text,
-        re.IGNORECASE,
-    )
-    if m:
-        return m.group(1)
+    if paymentref:
+        return paymentref.group(3)
 
     # Inline "INVOICE309730\n258793\n2025-11-10"
-    m = re.search(
-        r'INVOICE\s*[0-9]{4,}\s+[0-9]{4,}\s+(\d{4}-\d{2}-\d{2})',
-        text,
-        re.IGNORECASE,
-    )
-    if m:
-        return m.group(1)
+    if inline:
+        return inline.group(3)
 
     # Slashed dates like "11/06/2025" or "11/05/25"
     m = re.search(r'(\d{1,2}/\d{1,2}/\d{2,4})', text)
     if m:
-        cand = m.group(1)
-        try:
-            dt = date_parser.parse(cand, dayfirst=False)
-            dt = _normalize_year(dt)
-            return dt.date().isoformat()
-        except Exception:
-            pass
+        iso = _parse_date(m.group(1), dayfirst=False)
+        if iso:
+            return iso
 
     # Fallback: any ISO-looking date, still run through _normalize_year
     m = re.search(r'(\d{4}-\d{2}-\d{2})', text)
     if m:
         cand = m.group(1)
-        try:
-            dt = date_parser.parse(cand, fuzzy=True)
-            dt = _normalize_year(dt)
-            return dt.date().isoformat()
-        except Exception:
-            return cand
+        return _parse_date(cand, fuzzy=True) or cand
 
     return None
 
@@ -316,42 +392,61 @@ def extract_po_number(text: str) -> Optional[str]:
     return None
 
 
+# Known suppliers, checked in order (more specific patterns first).
+SUPPLIER_PATTERNS = [
+    # NAPA
+    (re.compile(r'NAPA\s+PORT\s+KELLS', re.IGNORECASE), "NAPA Port Kells"),
+    (re.compile(r'\bNAPA\b', re.IGNORECASE), "NAPA"),
+
+    # Lordco
+    (re.compile(r'\bLORDCO\b', re.IGNORECASE), "Lordco Auto Parts"),
+    (re.compile(r'\bLORDGO\b', re.IGNORECASE), "Lordco Auto Parts"),
+    (re.compile(r'= AUTO PA', re.IGNORECASE), "Lordco Auto Parts"),
+
+    # Action Car & Truck
+    (re.compile(r'ACTION\s+CAR\s+AND\s+TRUCK', re.IGNORECASE), "Action Car & Truck"),
+    (re.compile(r'CAR AND TRUCK ACCESSORIES', re.IGNORECASE), "Action Car & Truck"),
+
+    # PartSource
+    (re.compile(r'\bPARTSOURCE\b', re.IGNORECASE), "PartSource"),
+    (re.compile(r'The Parts[., ]+The Pros[., ]+The Price', re.IGNORECASE), "PartSource"),
+    (re.compile(r'PARTSOURCE\.CA', re.IGNORECASE), "PartSource"),
+    (re.compile(r'PARTS?\s*RCE', re.IGNORECASE), "PartSource"),
+
+    # Mopar / FCA / Stellantis
+    (re.compile(r'FCA CANADA', re.IGNORECASE), "FCA Canada / Mopar"),
+    (re.compile(r'MOPAR CANADA', re.IGNORECASE), "Mopar Canada"),
+    (re.compile(r'STELLANTIS', re.IGNORECASE), "Stellantis / Mopar"),
+
+    # Tire suppliers
+    (re.compile(r'KAL[- ]?TIRE', re.IGNORECASE), "Kal Tire"),
+    (re.compile(r'OK TIRE', re.IGNORECASE), "OK Tire"),
+
+    # Langley Chrysler – sometimes OCR gives 'BESTCHRYS'
+    (re.compile(r'LANGLEY\s+CHRYSLER', re.IGNORECASE), "Langley Chrysler"),
+    (re.compile(r'BESTCHRYS', re.IGNORECASE), "Langley Chrysler"),
+]
+
+# Header lines containing any of these are junk (returns policy, payment tender, etc.)
+SUPPLIER_JUNK_TOKENS = (
+    "MERCHANDISE", "RETURN POLICY", "RETURNS",
+    "PAYMENT USING", "TENDER", "INCREMENT",
+    "CHECKED AND RECEIVED",
+    "TOTAL", "SUB-TOTAL", "GST", "PST", "HST",
+)
+
+# "Company-ish" tokens that make a header line more likely to be the supplier name
+SUPPLIER_COMPANY_TOKENS = ("INC", "LTD", "LIMITED", "CORP", "COMPANY", "TIRE", "CHRYSLER")
+
+# One alternation per token list, so each header line is scanned once
+# instead of once per token. Tokens are already uppercase; match against up_ln.
+_SUPPLIER_JUNK_RE = re.compile("|".join(re.escape(t) for t in SUPPLIER_JUNK_TOKENS))
+_SUPPLIER_COMPANY_RE = re.compile("|".join(re.escape(t) for t in SUPPLIER_COMPANY_TOKENS))
+
+
 def extract_supplier_name(text: str) -> Optional[str]:
     # First, look for explicit patterns (known suppliers)
-    supplier_patterns = [
-        # NAPA
-        (re.compile(r'NAPA\s+PORT\s+KELLS', re.IGNORECASE), "NAPA Port Kells"),
-        (re.compile(r'\bNAPA\b', re.IGNORECASE), "NAPA"),
-
-        # Lordco
-        (re.compile(r'\bLORDCO\b', re.IGNORECASE), "Lordco Auto Parts"),
-        (re.compile(r'\bLORDGO\b', re.IGNORECASE), "Lordco Auto Parts"),
-        (re.compile(r'= AUTO PA', re.IGNORECASE), "Lordco Auto Parts"),
-
-        # Action Car & Truck
-        (re.compile(r'ACTION\s+CAR\s+AND\s+TRUCK', re.IGNORECASE), "Action Car & Truck"),
-        (re.compile(r'CAR AND TRUCK ACCESSORIES', re.IGNORECASE), "Action Car & Truck"),
-
-        # PartSource
-        (re.compile(r'\bPARTSOURCE\b', re.IGNORECASE), "PartSource"),
-        (re.compile(r'The Parts[., ]+The Pros[., ]+The Price', re.IGNORECASE), "PartSource"),
-        (re.compile(r'PARTSOURCE\.CA', re.IGNORECASE), "PartSource"),
-        (re.compile(r'PARTS?\s*RCE', re.IGNORECASE), "PartSource"),
-
-        # Mopar / FCA / Stellantis
-        (re.compile(r'FCA CANADA', re.IGNORECASE), "FCA Canada / Mopar"),
-        (re.compile(r'MOPAR CANADA', re.IGNORECASE), "Mopar Canada"),
-        (re.compile(r'STELLANTIS', re.IGNORECASE), "Stellantis / Mopar"),
-
-        # Tire suppliers
-        (re.compile(r'KAL[- ]?TIRE', re.IGNORECASE), "Kal Tire"),
-        (re.compile(r'OK TIRE', re.IGNORECASE), "OK Tire"),
-
-        # Langley Chrysler – sometimes OCR gives 'BESTCHRYS'
-        (re.compile(r'LANGLEY\s+CHRYSLER', re.IGNORECASE), "Langley Chrysler"),
-        (re.compile(r'BESTCHRYS', re.IGNORECASE), "Langley Chrysler"),
-    ]
-    for rgx, name in supplier_patterns:
+    for rgx, name in SUPPLIER_PATTERNS:
         if rgx.search(text):
             return name
 
@@ -366,19 +461,12 @@ def extract_supplier_name(text: str) -> Optional[str]:
 
     header_lines = [ln for ln in header_lines if ln]
 
-    # Filter out obvious junk (returns policy, payment tender, etc.)
-    junk_tokens = [
-        "MERCHANDISE", "RETURN POLICY", "RETURNS",
-        "PAYMENT USING", "TENDER", "INCREMENT",
-        "CHECKED AND RECEIVED",
-        "TOTAL", "SUB-TOTAL", "GST", "PST", "HST",
-    ]
-
     best = None
     best_score = 0.0
     for ln in header_lines:
         up_ln = ln.upper()
-        if any(tok in up_ln for tok in junk_tokens):
+        # Filter out obvious junk (returns policy, payment tender, etc.)
+        if _SUPPLIER_JUNK_RE.search(up_ln):
             continue
         if len(ln) < 4:
             continue
@@ -386,7 +474,7 @@ def extract_supplier_name(text: str) -> Optional[str]:
         # Score by how uppercase it is, plus a small boost for "company-ish" tokens
         up_count = sum(1 for c in ln if c.isupper())
         score = up_count / max(1, len(ln))
-        if any(tok in up_ln for tok in ["INC", "LTD", "LIMITED", "CORP", "COMPANY", "TIRE", "CHRYSLER"]):
+        if _SUPPLIER_COMPANY_RE.search(up_ln):
             score += 0.2
 
         if score > 0.5 and score > best_score:
@@ -463,28 +551,90 @@ def extract_totals(text: str):
     return subtotal, taxes, total
 
 
+_LETTER_RE = re.compile(r"[A-Za-z]")
+_DIGIT_RE = re.compile(r"\d")
+_MONEY_RE = re.compile(r"\d+\.\d{2}")
+_CLEAN_TOKEN_RE = re.compile(r"[A-Za-z0-9\-]+")
+
+LINE_ITEM_BLACKLIST = (
+    "SUB-TOTAL", "SUBTOTAL",
+    "GST", "PST", "HST", "TOTAL",
+    "INVOICE NUMBER", "INVOICE DATE",
+    "PAYMENT TERMS", "STORE #",
+    "BILL TO", "SHIP TO",
+    "WWW.", "PARTSOURCE.CA",
+    "MERCHANDISE RETURNS",
+    "RECEIVED BY (FULL NAME)",
+)
+_LINE_ITEM_BLACKLIST_RE = re.compile("|".join(re.escape(b) for b in LINE_ITEM_BLACKLIST))
+
+
+def _is_blacklisted_line(line: str) -> bool:
+    return _LINE_ITEM_BLACKLIST_RE.search(line.upper()) is not None
+
+
 def is_line_item_candidate(line: str) -> bool:
     # Must have some letters and at least one money value.
-    if not re.search(r"[A-Za-z]", line):
+    if not _LETTER_RE.search(line):
         return False
-    money = re.findall(r"\d+\.\d{2}", line)
-    if len(money) < 1:
+    if not _MONEY_RE.search(line):
         return False
+    return not _is_blacklisted_line(line)
 
-    blacklist = [
-        "SUB-TOTAL", "SUBTOTAL",
-        "GST", "PST", "HST", "TOTAL",
-        "INVOICE NUMBER", "INVOICE DATE",
-        "PAYMENT TERMS", "STORE #",
-        "BILL TO", "SHIP TO",
-        "WWW.", "PARTSOURCE.CA",
-        "MERCHANDISE RETURNS",
-        "RECEIVED BY (FULL NAME)",
-    ]
-    up = line.upper()
-    if any(b in up for b in blacklist):
-        return False
-    return True
+
+# Bit flags returned by _token_flags()
+_TOK_INT = 1      # pure digits
+_TOK_PART = 2     # has a digit and only [A-Za-z0-9-] (no money, no quotes)
+_TOK_LETTER = 4   # has at least one letter
+
+
+@lru_cache(maxsize=4096)
+def _token_flags(t: str) -> int:
+    """
+    Classify a token once. Tokens like "1", "2" and common part numbers
+    repeat constantly across lines and pages, so this is cached.
+    """
+    flags = 0
+    # str.isdecimal() accepts exactly what re's \d+ does
+    if t.isdecimal():
+        flags |= _TOK_INT
+    if _DIGIT_RE.search(t) and _CLEAN_TOKEN_RE.fullmatch(t):
+        flags |= _TOK_PART
+    if _LETTER_RE.search(t):
+        flags |= _TOK_LETTER
+    return flags
+
+
+def _score_part_tokens(tokens: List[str]) -> List[tuple[str, int]]:
+    """
+    Score the tokens of a line item that could be its part number.
+
+    - Early small integers (qty / line index) and short digit runs are dropped.
+    - Money ("12.50") and quoted tokens never pass the clean-token check.
+    - Repeated tokens (+2) and tokens with letters (+1) score higher.
+    """
+    freq = Counter(tokens)
+    cand_tokens: List[tuple[str, int]] = []
+    for idx, t in enumerate(tokens):
+        flags = _token_flags(t)
+
+        if flags & _TOK_INT:
+            # Short pure-digit tokens (e.g. "1", "2", "1234") are almost always
+            # quantities or line indices, not part numbers. Keep only LONG digit codes,
+            # and drop early pure-qty columns (e.g. "0000001") regardless of length.
+            if len(t) < 6 or (idx <= 2 and int(t) <= 10):
+                continue
+
+        if not flags & _TOK_PART:
+            continue
+
+        score = 1
+        if freq[t] > 1:
+            score += 2
+        if flags & _TOK_LETTER:
+            score += 1
+        cand_tokens.append((t, score))
+    return cand_tokens
 
 
 def extract_line_items(text: str) -> List[LineItem]:
@@ -496,35 +646,38 @@ def extract_line_items(text: str) -> List[LineItem]:
       "money-only" line, merge them into a single candidate line item.
     """
     items: List[LineItem] = []
-    lines = text.splitlines()
+    lines = [ln.rstrip() for ln in text.splitlines()]
+
+    # (has_letters, has_money) per line, probed once up front. The merge
+    # below peeks at the next line, which would otherwise be probed again
+    # on the following iteration.
+    flags = [(_LETTER_RE.search(ln) is not None, _MONEY_RE.search(ln) is not None) for ln in lines]
     i = 0
 
     while i < len(lines):
-        line = lines[i].rstrip()
+        line = lines[i]
         if not line:
             i += 1
             continue
 
-        line_has_letters = bool(re.search(r"[A-Za-z]", line))
-        line_has_money = bool(re.search(r"\d+\.\d{2}", line))
+        line_has_letters, line_has_money = flags[i]
 
         candidate_line = None
 
         # Case 1: plain old good candidate on a single line
-        if is_line_item_candidate(line):
-            candidate_line = line
+        # (same test as is_line_item_candidate, using the cached flags)
+        if line_has_letters and line_has_money:
+            if not _is_blacklisted_line(line):
+                candidate_line = line
 
-        else:
-            # Case 2: description-only line followed by money-only line
-            if line_has_letters and not line_has_money and i + 1 < len(lines):
-                next_line = lines[i + 1].rstrip()
-                next_has_letters = bool(re.search(r"[A-Za-z]", next_line))
-                next_has_money = bool(re.search(r"\d+\.\d{2}", next_line))
+        # Case 2: description-only line followed by money-only line
+        elif line_has_letters and i + 1 < len(lines):
+            next_has_letters, next_has_money = flags[i + 1]
 
-                # typical pattern: desc on one line, prices on next
-                if next_has_money and not next_has_letters:
-                    candidate_line = f"{line} {next_line}"
-                    i += 1  # consume the next line as part of this item
+            # typical pattern: desc on one line, prices on next
+            if next_has_money and not next_has_letters:
+                candidate_line = f"{line} {lines[i + 1]}"
+                i += 1  # consume the next line as part of this item
 
         if candidate_line is None:
             i += 1
@@ -533,7 +686,7 @@ def extract_line_items(text: str) -> List[LineItem]:
         raw = candidate_line
 
         # Money values: last one is line_total, previous maybe unit_price
-        money = re.findall(r"(\d+\.\d{2})", raw)
+        money = _MONEY_RE.findall(raw)
         qty: Optional[float] = None
         unit_price: Optional[float] = None
         line_total: Optional[float] = None
@@ -549,48 +702,8 @@ def extract_line_items(text: str) -> List[LineItem]:
                 except Exception:
                     pass
 
-        tokens = raw.split()
-        freq: Dict[str, int] = {}
-        for t in tokens:
-            freq[t] = freq.get(t, 0) + 1
-
         # Heuristic to pick a part number-like token
-        cand_tokens: List[tuple[str, int]] = []
-        for idx, tok in enumerate(tokens):
-            t = tok.strip()
-
-            # Drop early pure-qty columns (e.g. "1", "2") regardless of frequency
-            if idx <= 2 and re.fullmatch(r"\d+", t) and int(t) <= 10:
-                continue
-
-            # Pure decimals are always money, not part numbers
-            if re.fullmatch(r"\d+\.\d{2}", t):
-                continue
-
-            # Short pure-digit tokens (e.g. "1", "2", "1234") are almost always
-            # quantities or line indices, not part numbers. Keep only LONG digit codes.
-            if re.fullmatch(r"\d+", t):
-                if len(t) < 6:
-                    continue  # avoid "1" / "2"
-
-            # Skip tokens with quotes
-            if '"' in t:
-                continue
-
-            # Require at least one digit
-            if not re.search(r"\d", t):
-                continue
-
-            # Only allow reasonably clean tokens
-            if not re.fullmatch(r"[A-Za-z0-9\-]+", t):
-                continue
-
-            score = 1
-            if freq.get(t, 0) > 1:
-                score += 2
-            if re.search(r"[A-Za-z]", t):
-                score += 1
-            cand_tokens.append((t, score))
+        cand_tokens = _score_part_tokens(raw.split())
 
         part_number: Optional[str] = None
         if cand_tokens:
@@ -637,19 +750,37 @@ def _clean_summary_line_items(
     This cleans up invoices where only subtotal/total/tender lines
     would otherwise appear as fake items.
     """
-    cleaned: List[LineItem] = []
-    for li in items:
-        if (li.part_number is None or not str(li.part_number).strip()) and \
-           (li.description is None or not str(li.description).strip()):
-            if li.line_total is not None:
-                if subtotal is not None and abs(li.line_total - subtotal) < 0.01:
-                    continue
-                if total is not None and abs(li.line_total - total) < 0.01:
-                    continue
-                if abs(li.line_total) < 0.001:
-                    continue
-        cleaned.append(li)
-    return cleaned
+    def is_summary_row(li: LineItem) -> bool:
+        # Cheapest test first: most real items never equal subtotal/total/0.
+        lt = li.line_total
+        if lt is None:
+            return False
+        if not (
+            (subtotal is not None and abs(lt - subtotal) < 0.01)
+            or (total is not None and abs(lt - total) < 0.01)
+            or abs(lt) < 0.001
+        ):
+            return False
+        has_part = li.part_number is not None and str(li.part_number).strip()
+        has_desc = li.description is not None and str(li.description).strip()
+        return not has_part and not has_desc
+
+    return [li for li in items if not is_summary_row(li)]
+
+
+# Lines below an Action part line that end its description
+ACTION_STOP_TOKENS = (
+    "INVOICE",
+    "TOTAL",
+    "SUBTOTAL",
+    "SUB-TOTAL",
+    "GST",
+    "PST",
+    "HST",
+    "BILL TO",
+    "SHIP TO",
+)
+_ACTION_STOP_RE = re.compile("|".join(re.escape(t) for t in ACTION_STOP_TOKENS))
 
 
 def _augment_action_descriptions(text: str, items: List[LineItem]) -> List[LineItem]:
@@ -668,17 +799,27 @@ def _augment_action_descriptions(text: str, items: List[LineItem]) -> List[LineI
 
     lines = text.splitlines()
 
+    # Start offset of every line in `text`, so one text.find() per part
+    # number can be mapped back to its line index with bisect instead of
+    # re-scanning the lines for every item.
+    line_starts: List[int] = []
+    offset = 0
+    for ln in text.splitlines(keepends=True):
+        line_starts.append(offset)
+        offset += len(ln)
+
+    first_line: Dict[str, Optional[int]] = {}
+
     for li in items:
         if not li.part_number:
             continue
 
         # Find the first line containing the part number.
         part = li.part_number
-        base_idx = None
-        for idx, line in enumerate(lines):
-            if part in line:
-                base_idx = idx
-                break
+        if part not in first_line:
+            pos = text.find(part)
+            first_line[part] = bisect_right(line_starts, pos) - 1 if pos >= 0 else None
+        base_idx = first_line[part]
 
         if base_idx is None:
             continue
@@ -699,21 +840,7 @@ def _augment_action_descriptions(text: str, items: List[LineItem]) -> List[LineI
             if not has_letters or has_money:
                 break
 
-            up = peek.upper()
-            if any(
-                tok in up
-                for tok in [
-                    "INVOICE",
-                    "TOTAL",
-                    "SUBTOTAL",
-                    "SUB-TOTAL",
-                    "GST",
-                    "PST",
-                    "HST",
-                    "BILL TO",
-                    "SHIP TO",
-                ]
-            ):
+            if _ACTION_STOP_RE.search(peek.upper()):
                 break
 
             # This looks like a genuine description line.
@@ -724,6 +851,16 @@ def _augment_action_descriptions(text: str, items: List[LineItem]) -> List[LineI
     return items
 
 
+# Decoration / boilerplate stripped from Lordco descriptions, applied in
+# this order: each step sees the previous one's output (removing "Internet
+# Order" can bring "Method" next to "Date Terms"), so they cannot be
+# folded into one alternation.
+_LORDCO_STARS_RE = re.compile(r"\*+")
+_LORDCO_INTERNET_ORDER_RE = re.compile(r"\b[Ii]nternet\b\s+\b[Oo]rder\b")
+_LORDCO_METHOD_TERMS_RE = re.compile(r"\b[Mm]ethod\b\s+\b[Dd]ate\b\s+\b[Tt]erms\b.*")
+_LEADING_QTY_RE = re.compile(r"^\s*\d+\s+")
+
+
 def _normalize_lordco_description(desc: str) -> str:
     """
     Clean up Lordco descriptions like:
@@ -731,23 +868,65 @@ def _normalize_lordco_description(desc: str) -> str:
     into:
         "TIE ROD END"
     """
-    s = desc
-
     # Drop obvious decoration
-    s = re.sub(r"\*+", " ", s)
+    s = _LORDCO_STARS_RE.sub(" ", desc)
 
     # Remove "Internet Order" in any case
-    s = re.sub(r"\b[Ii]nternet\b\s+\b[Oo]rder\b", " ", s)
+    s = _LORDCO_INTERNET_ORDER_RE.sub(" ", s)
 
     # Drop "Method Date Terms" and everything after it
-    s = re.sub(r"\b[Mm]ethod\b\s+\b[Dd]ate\b\s+\b[Tt]erms\b.*", "", s)
+    s = _LORDCO_METHOD_TERMS_RE.sub("", s)
 
     # Remove leading pure quantity (e.g. "1 ")
-    s = re.sub(r"^\s*\d+\s+", " ", s)
+    s = _LEADING_QTY_RE.sub(" ", s, count=1)
 
     # Collapse whitespace
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    return " ".join(s.split())
+
+
+# Lines containing any of these are headers / totals, never Lordco part lines
+LORDCO_HEADER_TOKENS = (
+    "INVOICE",
+    "STATEMENT",
+    "SUBTOTAL",
+    "SUB-TOTAL",
+    "TOTAL",
+    "GST",
+    "PST",
+    "HST",
+    "ACCOUNT",
+    "CUSTOMER",
+    "BILL TO",
+    "SHIP TO",
+    "MAPLE RIDGE",
+    "WEB ORDER",
+    "VIN",
+    "REGISTRATION",
+    "OW ID",
+)
+_LORDCO_HEADER_RE = re.compile("|".join(re.escape(t) for t in LORDCO_HEADER_TOKENS))
+
+
+def _is_lordco_header_line(line: str) -> bool:
+    # Matched against line.upper() (not re.IGNORECASE) to keep str.upper()'s
+    # exact case mapping, as the old `tok in up` checks did.
+    return _LORDCO_HEADER_RE.search(line.upper()) is not None
+
+
+def _lordco_part_tokens(line: str) -> List[str]:
+    """
+    Tokens of `line` that could be Lordco part numbers, with punctuation
+    stripped: at least 5 characters, mixing letters and digits.
+    """
+    out: List[str] = []
+    for tok in line.split():
+        # Cleaning never makes a token longer, so skip short ones up front
+        if len(tok) < 5:
+            continue
+        clean = _NON_ALNUM_RE.sub("", tok)
+        if len(clean) >= 5 and _LETTER_RE.search(clean) and _DIGIT_RE.search(clean):
+            out.append(clean)
+    return out
 
 
 def _fallback_lordco_items(text: str) -> List[LineItem]:
@@ -771,43 +950,14 @@ def _fallback_lordco_items(text: str) -> List[LineItem]:
     lines = text.splitlines()
 
     # ---------- First pass: gather candidate token frequencies ----------
-    candidate_counts: Dict[str, int] = {}
-
-    header_tokens = [
-        "INVOICE",
-        "STATEMENT",
-        "SUBTOTAL",
-        "SUB-TOTAL",
-        "TOTAL",
-        "GST",
-        "PST",
-        "HST",
-        "ACCOUNT",
-        "CUSTOMER",
-        "BILL TO",
-        "SHIP TO",
-        "MAPLE RIDGE",
-        "WEB ORDER",
-        "VIN",
-        "REGISTRATION",
-        "OW ID",
-    ]
+    # Each line's candidates are kept so the second pass doesn't re-tokenize.
+    candidate_counts: Counter[str] = Counter()
+    line_candidates: List[List[str]] = []
 
     for line in lines:
-        up = line.upper()
-        if any(tok in up for tok in header_tokens):
-            continue
-
-        tokens = line.split()
-        for tok in tokens:
-            clean = re.sub(r"[^A-Za-z0-9]", "", tok)
-            if len(clean) < 5:
-                continue
-            if not re.search(r"[A-Za-z]", clean):
-                continue
-            if not re.search(r"\d", clean):
-                continue
-            candidate_counts[clean] = candidate_counts.get(clean, 0) + 1
+        cands = [] if _is_lordco_header_line(line) else _lordco_part_tokens(line)
+        line_candidates.append(cands)
+        candidate_counts.update(cands)
 
     if not candidate_counts:
         return items
@@ -822,24 +972,12 @@ def _fallback_lordco_items(text: str) -> List[LineItem]:
             i += 1
             continue
 
-        up = line.upper()
-        if any(tok in up for tok in header_tokens):
+        if _is_lordco_header_line(line):
             i += 1
             continue
 
-        tokens = line.split()
-        part_candidates: List[str] = []
-        for tok in tokens:
-            clean = re.sub(r"[^A-Za-z0-9]", "", tok)
-            if len(clean) < 5:
-                continue
-            if not re.search(r"[A-Za-z]", clean):
-                continue
-            if not re.search(r"\d", clean):
-                continue
-            # Only keep tokens that appear more than once on the page
-            if candidate_counts.get(clean, 0) >= 2:
-                part_candidates.append(clean)
+        # Only keep tokens that appear more than once on the page
+        part_candidates = [c for c in line_candidates[i] if candidate_counts[c] >= 2]
 
         if not part_candidates:
             i += 1
@@ -890,12 +1028,11 @@ def _fallback_lordco_items(text: str) -> List[LineItem]:
             peek = lines[i + 1].strip()
             has_letters = bool(re.search(r"[A-Za-z]", peek))
             has_money = bool(re.search(r"\d+\.\d{2}", peek))
-            up_peek = peek.upper()
 
             if (
                 has_letters
                 and not has_money
-                and not any(tok in up_peek for tok in header_tokens)
+                and not _is_lordco_header_line(peek)
             ):
                 desc = peek.strip()
                 i += 1  # consume the description line
@@ -941,7 +1078,8 @@ def build_invoice(text: str, pages: List[int]) -> InvoiceData:
 
     # Fallback: if subtotal is missing but we have line totals, sum them
     if subtotal is None and line_items:
-        line_sum = sum(li.line_total for li in line_items if li.line_total)
+        # fsum is exact, so many small totals can't drift by a cent before rounding
+        line_sum = math.fsum([li.line_total for li in line_items if li.line_total])
         if line_sum > 0:
             subtotal = round(line_sum, 2)
 
@@ -970,33 +1108,30 @@ def split_into_invoices(page_texts: List[str]) -> List[InvoiceData]:
          - If they contain money (subtotal or total), treat each as its own invoice.
          - If they contain no money, ignore (cover pages / junk).
     4. Return all invoices sorted by first page index.
+
+    An invoice number may recur anywhere in the document (e.g. a reprinted
+    page at the end of the scan), so grouping needs every page's text.
     """
     invoices: List[InvoiceData] = []
 
-    invoice_numbers: List[Optional[str]] = []
-    for txt in page_texts:
-        invoice_numbers.append(extract_invoice_number(txt))
-
     # Group pages by invoice number for inv != None
     inv_to_pages: Dict[str, List[int]] = {}
-    for idx, inv in enumerate(invoice_numbers):
+    unnumbered: List[int] = []
+    for idx, txt in enumerate(page_texts):
+        inv = extract_invoice_number(txt)
         if inv is None:
-            continue
-        inv_to_pages.setdefault(inv, []).append(idx)
+            unnumbered.append(idx)
+        else:
+            inv_to_pages.setdefault(inv, []).append(idx)
 
     # Build invoices for pages with known invoice numbers
-    for inv, pages in sorted(inv_to_pages.items(), key=lambda kv: kv[1][0]):
+    for pages in inv_to_pages.values():
         joined_text = "\n".join(page_texts[p] for p in pages)
         invoices.append(build_invoice(joined_text, pages))
 
-    # Mark which pages have already been used
-    used_pages = {p for pages in inv_to_pages.values() for p in pages}
-
     # Handle pages with no invoice number
-    for idx, txt in enumerate(page_texts):
-        if idx in used_pages:
-            continue
-
+    for idx in unnumbered:
+        txt = page_texts[idx]
         subtotal, taxes, total = extract_totals(txt)
         if subtotal is None and total is None:
             # No money at all: treat as header/junk
@@ -1006,11 +1141,254 @@ def split_into_invoices(page_texts: List[str]) -> List[InvoiceData]:
         invoices.append(build_invoice(txt, [idx]))
 
     # Sort invoices by the first page index to preserve document order
-    invoices.sort(key=lambda inv: min(inv.pages))
+    invoices.sort(key=lambda inv: inv.pages[0])
 
     return invoices
 
 
+# -------------------- Page text extraction -------------------- #
+
+# Below this many pages, starting a process pool costs more than it saves.
+PARALLEL_MIN_PAGES = 8
+
+# Text is read with pypdfium2 when installed, else PyPDF2; a "text
+# document" below is a pdfium.PdfDocument or a PyPDF2.PdfReader. PyPDF2
+# is still what copies pages into the per-invoice PDFs.
+
+def _open_text_document(pdf_path: str) -> Any:
+    if pdfium is not None:
+        return pdfium.PdfDocument(pdf_path)
+    return PyPDF2.PdfReader(pdf_path)
+
+
+def _page_count(doc: Any) -> int:
+    return len(doc) if pdfium is not None else len(doc.pages)
+
+
+def _page_text(doc: Any, index: int) -> str:
+    if pdfium is not None:
+        # pdfium ends lines with CRLF; the parsers work on "\n"
+        return doc[index].get_textpage().get_text_range().replace("\r\n", "\n")
+    return doc.pages[index].extract_text() or ""
+
+
+# Per-worker-process document, opened once by _init_text_worker.
+_worker_doc: Optional[Any] = None
+
+
+def _init_text_worker(pdf_path: str) -> None:
+    global _worker_doc
+    _worker_doc = _open_text_document(pdf_path)
+
+
+def _extract_page_texts(start: int, stop: int) -> List[str]:
+    return [_page_text(_worker_doc, index) for index in range(start, stop)]
+
+
+# Pages per task handed to a text worker
+TEXT_CHUNK_PAGES = 4
+
+
+def iter_page_texts(
+    pdf_path: Path,
+    workers: Optional[int] = None,
+    reader: Optional[PyPDF2.PdfReader] = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_index, text) for every page of pdf_path, in page order.
+
+    Extraction is CPU bound (PyPDF2's extract_text() is pure Python), so
+    pages are spread over a process pool (each worker opens the PDF once).
+    Small documents, or workers=1, are read in-process, using `reader`
+    if one is given and pypdfium2 is not installed.
+
+    At most 2x workers chunks of TEXT_CHUNK_PAGES pages are in flight, so
+    a slow consumer does not pile up finished text; closing the generator
+    early cancels what has not started.
+    """
+    if pdfium is not None or reader is None:
+        doc = _open_text_document(str(pdf_path))
+    else:
+        doc = reader
+    n_pages = _page_count(doc)
+    workers = workers or os.cpu_count() or 1
+
+    if workers <= 1 or n_pages < PARALLEL_MIN_PAGES:
+        for idx in range(n_pages):
+            yield idx, _page_text(doc, idx)
+        return
+
+    workers = min(workers, n_pages)
+    ex = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_text_worker,
+        initargs=(str(pdf_path),),
+    )
+    try:
+        starts = iter(range(0, n_pages, TEXT_CHUNK_PAGES))
+        pending: Deque[Tuple[int, Future]] = deque()
+        for start in itertools.islice(starts, 2 * workers):
+            stop = min(start + TEXT_CHUNK_PAGES, n_pages)
+            pending.append((start, ex.submit(_extract_page_texts, start, stop)))
+        while pending:
+            start, fut = pending.popleft()
+            texts = fut.result()
+            nxt = next(starts, None)
+            if nxt is not None:
+                stop = min(nxt + TEXT_CHUNK_PAGES, n_pages)
+                pending.append((nxt, ex.submit(_extract_page_texts, nxt, stop)))
+            for offset, text in enumerate(texts):
+                yield start + offset, text
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+
+
+# Page texts are cached by the PDF's content hash, so re-running on the same
+# file (e.g. while tuning the parsers) skips extraction entirely. Invoice
+# text is private, so the cache is per user: the directory is 0700 and
+# the files 0600. Entries not used for PAGE_TEXT_CACHE_MAX_AGE are removed
+# whenever a new one is written; delete the directory to clear it by hand.
+PAGE_TEXT_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    / "partsuite"
+    / "page_texts"
+)
+PAGE_TEXT_CACHE_MAX_AGE = 30 * 24 * 3600  # seconds
+# Part of every cache key; bump when _page_text's output changes
+PAGE_TEXT_CACHE_VERSION = 1
+
+
+def _private_dir(path: Path) -> bool:
+    """
+    Create path (0700) if needed; True if it is a directory only we can use.
+
+    An existing directory owned by someone else is not trusted; one of ours
+    with looser permissions is tightened.
+    """
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    st = path.stat()
+    if hasattr(os, "getuid") and st.st_uid != os.getuid():
+        return False
+    if st.st_mode & 0o077:
+        path.chmod(0o700)
+    return True
+
+
+def _prune_page_text_cache(cache_dir: Path) -> None:
+    # Also catches .part files left behind by a killed run
+    cutoff = time.time() - PAGE_TEXT_CACHE_MAX_AGE
+    for entry in itertools.chain(cache_dir.glob("*.jsonl"), cache_dir.glob("*.part")):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                entry.unlink()
+        except OSError:
+            pass
+
+
+def _file_sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _text_engine() -> str:
+    """Name and version of the text extractor, e.g. "pypdf2-3.0.1"."""
+    if pdfium is not None:
+        name, dist = "pdfium", "pypdfium2"
+    else:
+        name, dist = "pypdf2", "PyPDF2"
+    try:
+        version = importlib.metadata.version(dist)
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    return f"{name}-{version}"
+
+
+def _read_page_text_cache(cache_path: Path) -> Optional[List[str]]:
+    """The cached page texts, or None on a miss or an unreadable entry."""
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            texts = [json.loads(line) for line in f]
+        os.utime(cache_path)  # last use, for _prune_page_text_cache
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        console.print(f"[yellow]Ignoring page text cache entry {cache_path}: {e}[/yellow]")
+        return None
+    return texts
+
+
+def cached_page_texts(
+    pdf_path: Path,
+    cache_dir: Path = PAGE_TEXT_CACHE_DIR,
+    workers: Optional[int] = None,
+    reader: Optional[PyPDF2.PdfReader] = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    iter_page_texts, memoised on disk.
+
+    The cache file is keyed by the PDF's SHA1, the extraction engine and
+    its version, and PAGE_TEXT_CACHE_VERSION, and holds one JSON string
+    per page. On a miss pages are still streamed; the file only appears
+    once every page has been written. If cache_dir is not private to this
+    user, or the cache cannot be read or written, a warning is printed
+    and the pages are extracted as if there were no cache.
+    """
+    key = None
+    try:
+        if _private_dir(cache_dir):
+            key = f"{_file_sha1(pdf_path)}-{_text_engine()}-v{PAGE_TEXT_CACHE_VERSION}"
+        else:
+            console.print(f"[yellow]Not using page text cache {cache_dir}: owned by another user[/yellow]")
+    except OSError as e:
+        console.print(f"[yellow]Not using page text cache {cache_dir}: {e}[/yellow]")
+    if key is None:
+        yield from iter_page_texts(pdf_path, workers=workers, reader=reader)
+        return
+
+    cache_path = cache_dir / f"{key}.jsonl"
+    texts = _read_page_text_cache(cache_path)
+    if texts is not None:
+        yield from enumerate(texts)
+        return
+
+    try:
+        fd, tmp_name = tempfile.mkstemp(dir=cache_dir, prefix=f"{key}-", suffix=".part")
+    except OSError as e:
+        console.print(f"[yellow]Not writing page text cache {cache_dir}: {e}[/yellow]")
+        yield from iter_page_texts(pdf_path, workers=workers, reader=reader)
+        return
+
+    # A failed cache write only stops caching; extraction errors propagate
+    tmp_path = Path(tmp_name)
+    f = open(fd, "w", encoding="utf-8")
+    caching = True
+    try:
+        for idx, text in iter_page_texts(pdf_path, workers=workers, reader=reader):
+            if caching:
+                try:
+                    f.write(json.dumps(text) + "\n")
+                except OSError as e:
+                    console.print(f"[yellow]Not writing page text cache {cache_path}: {e}[/yellow]")
+                    caching = False
+            yield idx, text
+        if caching:
+            try:
+                f.close()
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                console.print(f"[yellow]Not writing page text cache {cache_path}: {e}[/yellow]")
+            else:
+                _prune_page_text_cache(cache_dir)
+    finally:
+        with suppress(OSError):
+            f.close()
+        with suppress(OSError):
+            tmp_path.unlink(missing_ok=True)
+
+
 # -------------------- OCR + PDF writing -------------------- #
 
 def run_ocr_if_requested(input_pdf: Path, do_ocr: bool) -> Path:
@@ -1046,46 +1424,291 @@ def run_ocr_if_requested(input_pdf: Path, do_ocr: bool) -> Path:
     return out_pdf
 
 
+# Concurrent PDF writes in save_invoices_as_pdfs
+PDF_WRITE_THREADS = 8
+
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _invoice_pdf_name(idx: int, inv: InvoiceData) -> str:
+    parts = []
+    if inv.supplier_name:
+        parts.append(inv.supplier_name)
+    if inv.invoice_number:
+        parts.append(inv.invoice_number)
+    else:
+        parts.append(f"invoice_{idx}")
+
+    name = "_".join(parts)
+    return _UNSAFE_FILENAME_RE.sub("_", name)
+
+
+def _write_pdf(writer: PyPDF2.PdfWriter, out_path: Path) -> None:
+    # Write beside the target and rename, so a failed run never leaves a
+    # truncated invoice PDF behind.
+    tmp_path = out_path.with_name(out_path.name + ".part")
+    with open(tmp_path, "wb") as f:
+        writer.write(f)
+    os.replace(tmp_path, out_path)
+
+
+def _reader_opener(reader: PyPDF2.PdfReader) -> Callable[[], PyPDF2.PdfReader]:
+    """A function that opens a new PdfReader on the same PDF as `reader`."""
+    name = getattr(reader.stream, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return lambda: PyPDF2.PdfReader(name)
+    reader.stream.seek(0)
+    data = reader.stream.read()
+    return lambda: PyPDF2.PdfReader(io.BytesIO(data))
+
+
+class _PdfWritePool:
+    """
+    Writes per-invoice PDFs on a thread pool.
+
+    A PdfReader is not thread safe (its objects are parsed lazily from one
+    shared file stream), so each thread opens its own reader on the same
+    PDF and copies the invoice's pages from that. At most 2x threads
+    invoices are in flight, to bound memory on big scans. If two invoices
+    get the same file name, the later one wins, exactly as when they were
+    written one after the other.
+    """
+
+    def __init__(self, reader: PyPDF2.PdfReader, output_dir: Path) -> None:
+        self._open_reader = _reader_opener(reader)
+        self._local = threading.local()
+        self.output_dir = output_dir
+        self._pool = ThreadPoolExecutor(max_workers=PDF_WRITE_THREADS)
+        self._pending: Deque[Future] = deque()
+        self._by_path: Dict[Path, Future] = {}
+
+    def _write(self, pages: List[int], out_path: Path) -> None:
+        reader = getattr(self._local, "reader", None)
+        if reader is None:
+            reader = self._local.reader = self._open_reader()
+        writer = PyPDF2.PdfWriter()
+        for pidx in pages:
+            writer.add_page(reader.pages[pidx])
+        _write_pdf(writer, out_path)
+
+    def submit(self, idx: int, inv: InvoiceData) -> Path:
+        if not self._by_path:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+        out_path = self.output_dir / f"{_invoice_pdf_name(idx, inv)}.pdf"
+
+        prev = self._by_path.get(out_path)
+        if prev is not None:
+            prev.result()
+        fut = self._pool.submit(self._write, list(inv.pages), out_path)
+        self._by_path[out_path] = fut
+        self._pending.append(fut)
+        if len(self._pending) >= 2 * PDF_WRITE_THREADS:
+            self._pending.popleft().result()
+        return out_path
+
+    def close(self) -> None:
+        """Wait for all writes; re-raises the first write error."""
+        try:
+            for fut in self._pending:
+                fut.result()
+        finally:
+            self._pool.shutdown()
+
+    def __enter__(self) -> "_PdfWritePool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
 def save_invoices_as_pdfs(
-    original_pdf: Path,
+    reader: PyPDF2.PdfReader,
     invoices: List[InvoiceData],
     output_dir: Path,
 ) -> List[Path]:
+    # The writer threads open their own readers on the file `reader` is reading
     output_dir.mkdir(parents=True, exist_ok=True)
-    reader = PyPDF2.PdfReader(str(original_pdf))
-    written_paths: List[Path] = []
+    with _PdfWritePool(reader, output_dir) as pdfs:
+        return [pdfs.submit(idx, inv) for idx, inv in enumerate(invoices, start=1)]
 
-    for idx, inv in enumerate(invoices, start=1):
-        writer = PyPDF2.PdfWriter()
-        for pidx in inv.pages:
-            writer.add_page(reader.pages[pidx])
 
-        parts = []
-        if inv.supplier_name:
-            parts.append(inv.supplier_name)
-        if inv.invoice_number:
-            parts.append(inv.invoice_number)
-        else:
-            parts.append(f"invoice_{idx}")
+# -------------------- SQLite helpers -------------------- #
 
-        name = "_".join(parts)
-        name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
-        out_path = output_dir / f"{name}.pdf"
+# Bulk-ingest tuning, applied by the CLI (init_db(path, INGEST_PRAGMAS)).
+# The DB can always be rebuilt from the PDFs / CDK exports, so WAL +
+# synchronous=NORMAL (no fsync per commit, only at checkpoints) is a safe
+# trade there. journal_mode is stored in the file, so once the CLI has run
+# other connections use WAL too; the rest are per connection.
+INGEST_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",    # 64 MiB
+    "PRAGMA mmap_size = 268435456",  # 256 MiB
+)
+
+# Read-side tuning for the report / show_* scripts (see open_db): a bigger
+# page cache than ingest so the aggregation scans and their indexes stay
+# resident across queries. Connection-local settings only: these scripts
+# must not change the file (no journal_mode here), and query_only makes
+# SQLite refuse any write.
+REPORT_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -131072",   # 128 MiB
+    "PRAGMA mmap_size = 268435456",  # 256 MiB
+)
+
+
+# Join keys and lookup columns used by the report / show_* scripts. The
+# line_items one also carries part_number and quantity, so the report
+# joins are answered from the index alone (covering index).
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_line_items_invoice_part_qty "
+    "ON line_items(invoice_id, part_number, quantity)",
+    "CREATE INDEX IF NOT EXISTS idx_line_items_part_number ON line_items(part_number)",
+    "CREATE INDEX IF NOT EXISTS idx_invoices_supplier_id ON invoices(supplier_id)",
+    "CREATE INDEX IF NOT EXISTS idx_suppliers_type ON suppliers(type)",
+)
+
+
+# Per-supplier invoice count / billed total for show_suppliers, kept
+# current by triggers on invoices instead of aggregating every run.
+# Invoices without a supplier are not counted (show_suppliers never
+# listed them). Keyed by object name; the SQL is compared with what
+# sqlite_master holds, so a changed definition is recreated by init_db.
+SUPPLIER_STATS_SCHEMA = {
+    "supplier_stats": """CREATE TABLE supplier_stats (
+        supplier_id INTEGER PRIMARY KEY,
+        invoice_count INTEGER NOT NULL DEFAULT 0,
+        total_billed REAL NOT NULL DEFAULT 0.0
+    )""",
+    "trg_invoices_stats_ai": """CREATE TRIGGER trg_invoices_stats_ai
+    AFTER INSERT ON invoices WHEN NEW.supplier_id IS NOT NULL
+    BEGIN
+        INSERT INTO supplier_stats(supplier_id, invoice_count, total_billed)
+        VALUES (NEW.supplier_id, 1, COALESCE(NEW.total, 0.0))
+        ON CONFLICT(supplier_id) DO UPDATE SET
+            invoice_count = invoice_count + 1,
+            total_billed = total_billed + excluded.total_billed;
+    END""",
+    "trg_invoices_stats_ad": """CREATE TRIGGER trg_invoices_stats_ad
+    AFTER DELETE ON invoices WHEN OLD.supplier_id IS NOT NULL
+    BEGIN
+        UPDATE supplier_stats SET
+            invoice_count = invoice_count - 1,
+            total_billed = total_billed - COALESCE(OLD.total, 0.0)
+        WHERE supplier_id = OLD.supplier_id;
+    END""",
+    "trg_invoices_stats_au": """CREATE TRIGGER trg_invoices_stats_au
+    AFTER UPDATE OF supplier_id, total ON invoices
+    WHEN OLD.total IS NOT NEW.total OR OLD.supplier_id IS NOT NEW.supplier_id
+    BEGIN
+        UPDATE supplier_stats SET
+            invoice_count = invoice_count - 1,
+            total_billed = total_billed - COALESCE(OLD.total, 0.0)
+        WHERE supplier_id = OLD.supplier_id;
+        INSERT INTO supplier_stats(supplier_id, invoice_count, total_billed)
+        SELECT NEW.supplier_id, 1, COALESCE(NEW.total, 0.0)
+        WHERE NEW.supplier_id IS NOT NULL
+        ON CONFLICT(supplier_id) DO UPDATE SET
+            invoice_count = invoice_count + 1,
+            total_billed = total_billed + excluded.total_billed;
+    END""",
+}
+
+# True when supplier_stats counts the same invoices as the invoices table
+# (cheap: a COUNT over idx_invoices_supplier_id and one row per supplier)
+SUPPLIER_STATS_IN_SYNC_SQL = """
+    SELECT (SELECT COUNT(*) FROM invoices WHERE supplier_id IS NOT NULL)
+         = (SELECT TOTAL(invoice_count) FROM supplier_stats)
+"""
 
-        with open(out_path, "wb") as f:
-            writer.write(f)
 
-        written_paths.append(out_path)
+def _rebuild_supplier_stats(conn: sqlite3.Connection) -> None:
+    # Recompute supplier_stats from invoices (inside the caller's transaction)
+    conn.execute("DELETE FROM supplier_stats")
+    conn.execute(
+        """
+        INSERT INTO supplier_stats(supplier_id, invoice_count, total_billed)
+        SELECT supplier_id, COUNT(*), COALESCE(SUM(total), 0.0)
+        FROM invoices
+        WHERE supplier_id IS NOT NULL
+        GROUP BY supplier_id
+        """
+    )
 
-    return written_paths
 
+def _ensure_supplier_stats(conn: sqlite3.Connection) -> None:
+    """
+    Create or update supplier_stats and its triggers, and resync the table
+    if it has drifted from invoices. Opening an up-to-date DB only reads.
+    """
+    current = dict(conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE name IN (%s)"
+        % ", ".join("?" * len(SUPPLIER_STATS_SCHEMA)),
+        tuple(SUPPLIER_STATS_SCHEMA),
+    ))
+    if current == SUPPLIER_STATS_SCHEMA:
+        if not conn.execute(SUPPLIER_STATS_IN_SYNC_SQL).fetchone()[0]:
+            with transaction(conn):
+                _rebuild_supplier_stats(conn)
+        return
+
+    with transaction(conn):
+        for name, sql in SUPPLIER_STATS_SCHEMA.items():
+            if current.get(name) == sql:
+                continue
+            if name in current:
+                kind = "TABLE" if name == "supplier_stats" else "TRIGGER"
+                conn.execute(f"DROP {kind} {name}")
+            conn.execute(sql)
+        _rebuild_supplier_stats(conn)
 
-# -------------------- SQLite helpers -------------------- #
 
-def init_db(path: Path) -> sqlite3.Connection:
+@contextmanager
+def transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """
+    Run the block as one transaction: COMMIT on success, ROLLBACK on error.
+
+    Works with sqlite3's default transaction handling (as from init_db) and
+    with autocommit connections. A transaction the caller already has open
+    is joined and committed with the block, as insert_invoice_into_db's
+    final commit always did.
+    """
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def open_db(path: Path) -> sqlite3.Connection:
+    """
+    Connect read-only to an existing invoices.db for reporting
+    (REPORT_PRAGMAS).
+    """
+    conn = sqlite3.connect(str(path))
+    for pragma in REPORT_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def init_db(path: Path, pragmas: Iterable[str] = ()) -> sqlite3.Connection:
+    """
+    Connect to (and create the schema in) the invoices DB.
+
+    `pragmas` run first, e.g. INGEST_PRAGMAS for the bulk CLI. Writes go
+    through transaction(), or sqlite3's usual commit().
+    """
     conn = sqlite3.connect(str(path))
     cur = conn.cursor()
     cur.execute("PRAGMA foreign_keys = ON")
+    for pragma in pragmas:
+        cur.execute(pragma)
 
     cur.execute(
         """
@@ -1127,7 +1750,10 @@ def init_db(path: Path) -> sqlite3.Connection:
         )
         """
     )
-    conn.commit()
+    for index_sql in INDEXES:
+        cur.execute(index_sql)
+
+    _ensure_supplier_stats(conn)
     return conn
 
 
@@ -1138,69 +1764,173 @@ def upsert_supplier(
 ) -> Optional[int]:
     if not name:
         return None
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT OR IGNORE INTO suppliers(name, type) VALUES (?, ?)",
+    # One round-trip: insert if new, otherwise a no-op update so RETURNING
+    # still gives us the existing id (the stored type is left as-is).
+    row = conn.execute(
+        """
+        INSERT INTO suppliers(name, type) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET name = excluded.name
+        RETURNING id
+        """,
         (name, supplier_type),
-    )
-    cur.execute("SELECT id FROM suppliers WHERE name = ?", (name,))
-    row = cur.fetchone()
+    ).fetchone()
     return row[0] if row else None
 
 
-def insert_invoice_into_db(
-    conn: sqlite3.Connection,
-    inv: InvoiceData,
-    pdf_path: Path,
-) -> None:
-    cur = conn.cursor()
-    supplier_id = upsert_supplier(conn, inv.supplier_name, inv.supplier_type)
-    taxes_json = json.dumps(inv.taxes)
+INSERT_LINE_ITEM_SQL = """
+    INSERT INTO line_items(
+        invoice_id, part_number, description, quantity,
+        unit_price, line_total, raw_line
+    ) VALUES
+"""
+LINE_ITEM_PLACEHOLDERS = "(?, ?, ?, ?, ?, ?, ?)"
 
-    cur.execute(
+# Rows per multi-row INSERT: 90 x 7 parameters stays under SQLite's
+# historical 999 bound-parameter limit.
+LINE_ITEM_CHUNK = 90
+
+
+@lru_cache(maxsize=None)
+def _insert_line_items_sql(n_rows: int) -> str:
+    # Same text for the same size, so sqlite3's statement cache reuses it
+    return INSERT_LINE_ITEM_SQL + ", ".join([LINE_ITEM_PLACEHOLDERS] * n_rows)
+
+
+def _insert_line_items(conn: sqlite3.Connection, rows: List[tuple]) -> None:
+    """
+    Insert line item rows with one multi-row VALUES statement per chunk,
+    instead of executemany running the single-row statement per item.
+    """
+    for start in range(0, len(rows), LINE_ITEM_CHUNK):
+        chunk = rows[start : start + LINE_ITEM_CHUNK]
+        conn.execute(
+            _insert_line_items_sql(len(chunk)),
+            list(itertools.chain.from_iterable(chunk)),
+        )
+
+
+def _invoice_values(inv: InvoiceData, pdf_path: Path) -> tuple:
+    """
+    The invoices row after supplier_id, with taxes already JSON-encoded.
+
+    Built before the transaction, so the transaction itself only runs SQL.
+    """
+    return (
+        inv.invoice_number,
+        inv.invoice_date,
+        inv.po_number,
+        inv.subtotal,
+        inv.total,
+        json.dumps(inv.taxes),
+        str(pdf_path),
+    )
+
+
+def _insert_invoice_row(
+    conn: sqlite3.Connection,
+    supplier_id: Optional[int],
+    values: tuple,
+) -> int:
+    """Insert the invoices row and return its id."""
+    cur = conn.execute(
         """
         INSERT INTO invoices(
             supplier_id, invoice_number, invoice_date, po_number,
             subtotal, total, taxes_json, pdf_path
         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """,
-        (
-            supplier_id,
-            inv.invoice_number,
-            inv.invoice_date,
-            inv.po_number,
-            inv.subtotal,
-            inv.total,
-            taxes_json,
-            str(pdf_path),
-        ),
+        (supplier_id, *values),
     )
-    inv_id = cur.lastrowid
-
-    for li in inv.line_items:
-        cur.execute(
-            """
-            INSERT INTO line_items(
-                invoice_id, part_number, description, quantity,
-                unit_price, line_total, raw_line
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                inv_id,
-                li.part_number,
-                li.description,
-                li.quantity,
-                li.unit_price,
-                li.line_total,
-                li.raw_line,
-            )
+    return cur.lastrowid
+
+
+def _line_item_rows(inv_id: int, inv: InvoiceData) -> List[tuple]:
+    return [
+        (
+            inv_id,
+            li.part_number,
+            li.description,
+            li.quantity,
+            li.unit_price,
+            li.line_total,
+            li.raw_line,
         )
+        for li in inv.line_items
+    ]
 
-    conn.commit()
+
+def insert_invoice_into_db(
+    conn: sqlite3.Connection,
+    inv: InvoiceData,
+    pdf_path: Path,
+) -> None:
+    values = _invoice_values(inv, pdf_path)
+    # One transaction for the invoice and all of its line items
+    with transaction(conn):
+        supplier_id = upsert_supplier(conn, inv.supplier_name, inv.supplier_type)
+        inv_id = _insert_invoice_row(conn, supplier_id, values)
+        _insert_line_items(conn, _line_item_rows(inv_id, inv))
+
+
+def _store_invoices(
+    conn: sqlite3.Connection,
+    prepared: Iterable[Tuple[InvoiceData, tuple]],
+) -> int:
+    """
+    Store (invoice, _invoice_values) pairs in ONE transaction.
+
+    A bulk scan repeats the same few suppliers, so their ids are looked
+    up (upserted) once per name and then reused from a dict.
+    """
+    supplier_ids: Dict[str, Optional[int]] = {}
+    count = 0
+    with transaction(conn):
+        for inv, values in prepared:
+            name = inv.supplier_name
+            if name not in supplier_ids:
+                supplier_ids[name] = upsert_supplier(conn, name, inv.supplier_type)
+            inv_id = _insert_invoice_row(conn, supplier_ids[name], values)
+            _insert_line_items(conn, _line_item_rows(inv_id, inv))
+            count += 1
+    return count
+
+
+def insert_invoices_into_db(
+    conn: sqlite3.Connection,
+    items: Iterable[Tuple[InvoiceData, Path]],
+) -> int:
+    """
+    Bulk version of insert_invoice_into_db for a whole run.
+
+    `items` yields (invoice, pdf_path) pairs and may be a stream: everything
+    is written inside ONE transaction instead of committing per invoice.
+    Returns the number of invoices stored.
+    """
+    # A list is encoded up front, before BEGIN; a stream as it arrives.
+    if isinstance(items, list):
+        prepared = [(inv, _invoice_values(inv, path)) for inv, path in items]
+    else:
+        prepared = ((inv, _invoice_values(inv, path)) for inv, path in items)
+    return _store_invoices(conn, prepared)
 
 
 # -------------------- CLI entry -------------------- #
 
+def _summary_row(idx: int, inv: InvoiceData, path: Path) -> Tuple[str, ...]:
+    """One row of the CLI's "Extracted invoices" table."""
+    return (
+        str(idx),
+        inv.supplier_name or "?",
+        inv.supplier_type or "?",
+        inv.invoice_number or "?",
+        inv.invoice_date or "?",
+        ",".join(str(p + 1) for p in inv.pages),
+        f"{inv.subtotal:.2f}" if inv.subtotal is not None else "",
+        f"{inv.total:.2f}" if inv.total is not None else "",
+        str(path),
+    )
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     parser = argparse.ArgumentParser(
         description="Split a bulk invoice PDF and extract key fields.",
@@ -1228,7 +1958,19 @@ def main(argv: Optional[List[str]] = None) -> int:
         action="store_false",
         help="Disable OCR and assume input_pdf already has text.",
     )
-    parser.set_defaults(ocr=True)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes for page text extraction (default: CPU count; 1 disables).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="cache",
+        action="store_false",
+        help=f"Always re-extract page text (default: cache it in {PAGE_TEXT_CACHE_DIR}).",
+    )
+    parser.set_defaults(ocr=True, cache=True)
 
     args = parser.parse_args(argv)
 
@@ -1241,16 +1983,26 @@ def main(argv: Optional[List[str]] = None) -> int:
 
     console.print(f"[cyan]Reading:[/cyan] {ocr_pdf}")
     reader = PyPDF2.PdfReader(str(ocr_pdf))
-    page_texts = [p.extract_text() or "" for p in reader.pages]
 
-    invoices = split_into_invoices(page_texts)
+    # Pages are extracted in worker processes. Grouping needs every page
+    # (an invoice number may recur anywhere), so all page text is held
+    # until the document has been split. The extraction pool is done
+    # before the PDF writer threads start, so it never forks a process
+    # that has other threads running.
+    if args.cache:
+        page_texts = cached_page_texts(ocr_pdf, workers=args.workers, reader=reader)
+    else:
+        page_texts = iter_page_texts(ocr_pdf, workers=args.workers, reader=reader)
+
+    invoices = split_into_invoices([text for _, text in page_texts])
     if not invoices:
         console.print(
             "[red]No invoices detected. Check OCR output and invoice number patterns.[/red]"
         )
         return 1
 
-    written_paths = save_invoices_as_pdfs(ocr_pdf, invoices, args.output_dir)
+    with _PdfWritePool(reader, args.output_dir) as pdfs:
+        written_paths = [pdfs.submit(idx, inv) for idx, inv in enumerate(invoices, start=1)]
 
     # Summary table
     console.print()
@@ -1266,24 +2018,16 @@ def main(argv: Optional[List[str]] = None) -> int:
     table.add_column("PDF path")
 
     for idx, (inv, path) in enumerate(zip(invoices, written_paths), start=1):
-        table.add_row(
-            str(idx),
-            inv.supplier_name or "?",
-            inv.supplier_type or "?",
-            inv.invoice_number or "?",
-            inv.invoice_date or "?",
-            ",".join(str(p + 1) for p in inv.pages),
-            f"{inv.subtotal:.2f}" if inv.subtotal is not None else "",
-            f"{inv.total:.2f}" if inv.total is not None else "",
-            str(path),
-        )
+        table.add_row(*_summary_row(idx, inv, path))
     console.print(table)
 
     if args.db:
-        conn = init_db(args.db)
-        for inv, path in zip(invoices, written_paths):
-            insert_invoice_into_db(conn, inv, path)
-        console.print(f"[green]Stored {len(invoices)} invoice(s) in[/green] {args.db}")
+        conn = init_db(args.db, INGEST_PRAGMAS)
+        try:
+            stored = insert_invoices_into_db(conn, list(zip(invoices, written_paths)))
+        finally:
+            conn.close()
+        console.print(f"[green]Stored {stored} invoice(s) in[/green] {args.db}")
 
     console.print("[green]Done.[/green]")
     return 0
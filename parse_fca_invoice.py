@@ -68,6 +68,9 @@ class FCALineItem:
 INVOICE_NO_RE = re.compile(r"INVOICE NUMBER:\s*(.+)")
 INVOICE_DATE_RE = re.compile(r"INVOICE DATE\s*:\s*(.+)", re.IGNORECASE)
 TOTAL_INVOICE_RE = re.compile(r"TOTAL THIS INVOICE", re.IGNORECASE)
+# Part line: line number then part number
+PART_LINE_RE = re.compile(r"^\s*\d+\s+[A-Z0-9]")
+NUMBER_TOKEN_RE = re.compile(r"[0-9]*\.?[0-9]+")
 
 
 def parse_invoice_date(text: str) -> str:
@@ -82,6 +85,14 @@ def parse_invoice_date(text: str) -> str:
     return text
 
 
+# Header fields, each searched on its own so their order on the line does
+# not matter. Keywords only count as whole tokens, like the old token scan:
+# the first "ORD#:" / "DATE:" followed by a value, and the last "O/T:".
+ORDER_NUMBER_RE = re.compile(r"(?<!\S)ORD#:\s+(\S+)")
+ORDER_TYPE_RE = re.compile(r"(?<!\S)O/T:(\S*)")
+ORDER_DATE_RE = re.compile(r"(?<!\S)DATE:\s+(\S+)")
+
+
 def parse_order_header(line: str) -> Optional[FCAContext]:
     """
     Example:
@@ -90,38 +101,14 @@ def parse_order_header(line: str) -> Optional[FCAContext]:
     if "ORD#:" not in line or "DATE:" not in line:
         return None
 
-    tokens = line.split()
-    if not tokens:
-        return None
-
-    location = tokens[0]
-
-    order_number = None
-    order_type = None
-    order_date = None
-
-    # ORD#: <value>
-    if "ORD#:" in tokens:
-        idx = tokens.index("ORD#:") + 1
-        if idx < len(tokens):
-            order_number = tokens[idx]
-
-    # O/T:E (single token)
-    for tok in tokens:
-        if tok.startswith("O/T:"):
-            order_type = tok.split(":", 1)[1] or None
-
-    # DATE: YYYY-MM-DD
-    if "DATE:" in tokens:
-        idx = tokens.index("DATE:") + 1
-        if idx < len(tokens):
-            order_date = tokens[idx]
-
+    order_number = ORDER_NUMBER_RE.search(line)
+    order_types = ORDER_TYPE_RE.findall(line)
+    order_date = ORDER_DATE_RE.search(line)
     return FCAContext(
-        location=location,
-        order_number=order_number,
-        order_type=order_type,
-        order_date=order_date,
+        location=line.split(None, 1)[0],
+        order_number=order_number and order_number.group(1),
+        order_type=order_types[-1] if order_types and order_types[-1] else None,
+        order_date=order_date and order_date.group(1),
     )
 
 
@@ -138,28 +125,25 @@ def parse_mopar_part_line(raw_line: str) -> Optional[tuple[str, str, str, float,
     We only care about qty, unit_price, gross_amount, net_amount, s_code.
     Description is everything between part_no and qty.
     """
-    tokens = raw_line.split()
     # Must at least have: line_no, part_no, desc, qty, unit, gross, dc%, dc_x, dc_amt, net, code
-    if len(tokens) < 11:
+    # Last 8 are numeric fields + S code; split them off the right once.
+    fields = raw_line.rsplit(None, 8)
+    if len(fields) < 9:
         return None
+    head, qty_tok, unit_tok, gross_tok, _dc_pct, _dc_misc, _dc_amt, net_tok, s_code = fields
 
-    # First token must be a line number
-    if not tokens[0].isdigit():
+    # Head is line number, part number, then the description
+    head_tokens = head.split(None, 2)
+    if len(head_tokens) < 3:
         return None
+    line_no, part_no, description = head_tokens
 
-    line_no = tokens[0]
-    part_no = tokens[1]
-
-    # Last 8 are numeric fields + S code
-    qty_tok = tokens[-8]
-    unit_tok = tokens[-7]
-    gross_tok = tokens[-6]
-    net_tok = tokens[-2]
-    s_code = tokens[-1]
+    # First token must be a line number
+    if not line_no.isdigit():
+        return None
 
-    # Description is everything between part_no and qty
-    desc_tokens = tokens[2 : len(tokens) - 8]
-    description = " ".join(desc_tokens).strip()
+    # Collapse column padding inside the description to single spaces
+    description = " ".join(description.split())
 
     def to_float(s: str) -> float:
         s = s.replace(",", "")
@@ -181,7 +165,10 @@ def parse_mopar_part_line(raw_line: str) -> Optional[tuple[str, str, str, float,
     return line_no, part_no, description, qty, unit_price, gross, net, s_code
 
 
-def extract_fca_invoice(pdf_path: Path) -> tuple[FCAHeader, List[FCALineItem]]:
+def extract_fca_invoice(
+    pdf_path: Path,
+    workers: Optional[int] = None,
+) -> tuple[FCAHeader, List[FCALineItem]]:
     reader = PdfReader(str(pdf_path))
     pages = len(reader.pages)
 
@@ -192,20 +179,25 @@ def extract_fca_invoice(pdf_path: Path) -> tuple[FCAHeader, List[FCALineItem]]:
     ctx = FCAContext()
     items: List[FCALineItem] = []
 
-    for page_index, page in enumerate(reader.pages, start=1):
-        text = page.extract_text() or ""
+    # Page text is extracted in parallel for multi-page invoices
+    for page_idx0, text in base.iter_page_texts(pdf_path, workers=workers, reader=reader):
+        page_index = page_idx0 + 1
         for raw_line in text.splitlines():
             line = raw_line.rstrip()
 
-            # Header: invoice number
-            m_no = INVOICE_NO_RE.search(line)
-            if m_no and invoice_number is None:
+            # Header: invoice number (searched only until found, and only
+            # on lines that contain the label)
+            if (
+                invoice_number is None
+                and "INVOICE NUMBER:" in line
+                and (m_no := INVOICE_NO_RE.search(line))
+            ):
                 invoice_number = m_no.group(1).strip()
                 continue
 
-            # Header: invoice date
-            m_dt = INVOICE_DATE_RE.search(line)
-            if m_dt and invoice_date is None:
+            # Header: invoice date (case-insensitive label, so no substring
+            # guard; skipped once found)
+            if invoice_date is None and (m_dt := INVOICE_DATE_RE.search(line)):
                 invoice_date = parse_invoice_date(m_dt.group(1))
                 continue
 
@@ -213,21 +205,22 @@ def extract_fca_invoice(pdf_path: Path) -> tuple[FCAHeader, List[FCALineItem]]:
             if TOTAL_INVOICE_RE.search(line):
                 # e.g. "TOTAL THIS INVOICE              1800.23          1800.23"
                 toks = line.split()
-                nums = [t for t in toks if re.fullmatch(r"[0-9]*\.?[0-9]+", t)]
+                nums = [t for t in toks if NUMBER_TOKEN_RE.fullmatch(t)]
                 if nums:
                     try:
                         total_invoice = float(nums[-1])
                     except ValueError:
                         pass
 
-            # Order header
-            ord_ctx = parse_order_header(line)
-            if ord_ctx:
-                ctx = ord_ctx
-                continue
+            # Order header (cheap guard first; most lines are part lines)
+            if "ORD#:" in line:
+                ord_ctx = parse_order_header(line)
+                if ord_ctx:
+                    ctx = ord_ctx
+                    continue
 
             # Part line: must start with digit then part number
-            if re.match(r"^\s*\d+\s+[A-Z0-9]", raw_line):
+            if PART_LINE_RE.match(raw_line):
                 parsed = parse_mopar_part_line(raw_line)
                 if parsed and invoice_number and invoice_date:
                     (
@@ -17,69 +17,82 @@ from __future__ import annotations
 
 import argparse
 import sqlite3
+import sys
 from pathlib import Path
-from typing import Dict, Tuple, List
-from invoice_pipeline import normalize_part
+from typing import Tuple, List
+from invoice_pipeline import normalize_part, open_db
 
 
-def load_mopar_billed_quantities(conn: sqlite3.Connection) -> Dict[str, float]:
-    """
-    Return {canonical_part_number: total_billed_qty} for invoices from Mopar/FCA.
-    """
-    cur = conn.cursor()
-    rows = cur.execute(
-        """
-        SELECT li.part_number, COALESCE(SUM(li.quantity), 0.0) AS qty
+# Both sides aggregated per canonical part and compared in one query: one
+# UNION ALL + GROUP BY, and HAVING keeps only the parts that differ (a
+# part missing on one side counts as 0.0 there).
+BILLED_VS_RECEIVED_SQL = """
+    WITH q AS (
+        SELECT normalize_part(li.part_number) AS part, li.quantity AS bq, 0.0 AS rq
         FROM line_items li
         JOIN invoices inv ON li.invoice_id = inv.id
         JOIN suppliers s ON inv.supplier_id = s.id
-        WHERE s.name LIKE 'Mopar Canada%' OR s.type = 'chrysler_corp'
-        GROUP BY li.part_number
-        """
-    ).fetchall()
-
-    billed: Dict[str, float] = {}
-    for part, qty in rows:
-        if not part:
-            continue
-        key = normalize_part(part)
-        billed[key] = billed.get(key, 0.0) + (qty or 0.0)
-    return billed
+        WHERE (s.name LIKE 'Mopar Canada%' OR s.type = 'chrysler_corp')
+          AND li.part_number <> ''
+        UNION ALL
+        SELECT normalize_part(part_number), 0.0, qty_received
+        FROM receipts_lines
+        WHERE transcode = 'R' AND part_number <> ''
+    ),
+    totals AS (
+        SELECT part, TOTAL(bq) AS bq, TOTAL(rq) AS rq, TOTAL(bq) - TOTAL(rq) AS diff
+        FROM q
+        GROUP BY part
+        HAVING ABS(diff) >= 1e-6
+    )
+    SELECT part, bq, rq, diff
+    FROM (
+        SELECT *, ROW_NUMBER() OVER (
+            PARTITION BY diff > 0 ORDER BY ABS(diff) DESC, part
+        ) AS rn
+        FROM totals
+    )
+    WHERE rn <= ?
+    ORDER BY ABS(diff) DESC, part
+"""
 
 
-def load_fca_received_quantities(conn: sqlite3.Connection) -> Dict[str, float]:
+def load_billed_vs_received(
+    conn: sqlite3.Connection,
+    limit: int,
+) -> Tuple[List[Tuple[str, float, float, float]], List[Tuple[str, float, float, float]]]:
     """
-    Return {canonical_part_number: total_received_qty} from receipts_lines where
-    transcode = 'R' (FCA shipments).
+    Return (billed_more, received_more): up to `limit` rows each of
+    (part, billed, received, diff), largest absolute difference first.
+    Only the top rows of each section are returned (ROW_NUMBER() per
+    section), not every mismatched part.
+
+    Normalization, aggregation and the diff all happen inside SQLite;
+    normalize_part is registered as a SQL function so part numbers are
+    canonicalized exactly as everywhere else.
     """
-    cur = conn.cursor()
-    rows = cur.execute(
-        """
-        SELECT part_number, COALESCE(SUM(qty_received), 0.0) AS qty
-        FROM receipts_lines
-        WHERE transcode = 'R'
-        GROUP BY part_number
-        """
-    ).fetchall()
+    conn.create_function("normalize_part", 1, normalize_part, deterministic=True)
 
-    rec: Dict[str, float] = {}
-    for part, qty in rows:
-        if not part:
-            continue
-        key = normalize_part(part)
-        rec[key] = rec.get(key, 0.0) + (qty or 0.0)
-    return rec
+    billed_more: List[Tuple[str, float, float, float]] = []
+    received_more: List[Tuple[str, float, float, float]] = []
+    for row in conn.execute(BILLED_VS_RECEIVED_SQL, (limit,)):
+        (billed_more if row[3] > 0 else received_more).append(row)
+    return billed_more, received_more
 
 
 def format_section(title: str, rows: List[Tuple[str, float, float, float]], limit: int) -> None:
-    print()
-    print(title)
-    print("-" * len(title))
-    print(f"{'Part #':<15} {'Billed':>10} {'Received':>10} {'Diff(b-r)':>10}")
-    print("-" * 50)
+    # Built up and written once rather than a print() per row
+    lines = [
+        "",
+        title,
+        "-" * len(title),
+        f"{'Part #':<15} {'Billed':>10} {'Received':>10} {'Diff(b-r)':>10}",
+        "-" * 50,
+    ]
     for part, billed, rec, diff in rows[:limit]:
-        print(f"{part:<15} {billed:>10.2f} {rec:>10.2f} {diff:>10.2f}")
-    print()
+        lines.append(f"{part:<15} {billed:>10.2f} {rec:>10.2f} {diff:>10.2f}")
+    lines.append("")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main() -> None:
@@ -101,30 +114,9 @@ def main() -> None:
 
     args = ap.parse_args()
 
-    conn = sqlite3.connect(args.db)
-
-    billed = load_mopar_billed_quantities(conn)
-    received = load_fca_received_quantities(conn)
-
-    all_parts = sorted(set(billed.keys()) | set(received.keys()))
-
-    billed_more: List[Tuple[str, float, float, float]] = []
-    received_more: List[Tuple[str, float, float, float]] = []
+    conn = open_db(args.db)
 
-    for part in all_parts:
-        bq = billed.get(part, 0.0)
-        rq = received.get(part, 0.0)
-        diff = bq - rq
-        if abs(diff) < 1e-6:
-            continue
-        if diff > 0:
-            billed_more.append((part, bq, rq, diff))
-        else:
-            received_more.append((part, bq, rq, diff))
-
-    # Sort: largest absolute difference first
-    billed_more.sort(key=lambda r: r[3], reverse=True)
-    received_more.sort(key=lambda r: abs(r[3]), reverse=True)
+    billed_more, received_more = load_billed_vs_received(conn, args.limit)
 
     format_section("Billed more than received (possible outstanding)", billed_more, args.limit)
     format_section("Received more than billed (possible over-receipt / mismatch)", received_more, args.limit)
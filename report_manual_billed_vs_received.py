@@ -25,97 +25,86 @@ from __future__ import annotations
 
 import argparse
 import sqlite3
+import sys
 from pathlib import Path
-from typing import Dict, Tuple, List, Optional
+from typing import Tuple, List, Optional
 
-from invoice_pipeline import normalize_part
+from invoice_pipeline import normalize_part, open_db
 
 
-def load_external_billed_quantities(
+def load_billed_vs_received(
     conn: sqlite3.Connection,
     supplier_filter: Optional[str],
-) -> Dict[str, float]:
+    limit: int,
+) -> Tuple[List[Tuple[str, float, float, float]], List[Tuple[str, float, float, float]]]:
     """
-    Return {canonical_part_number: total_billed_qty} for non-FCA, non-self suppliers.
+    Return (billed_more, received_more): up to `limit` rows each of
+    (part, billed, received, diff), largest absolute difference first.
 
-    If supplier_filter is provided, only include suppliers whose name matches
-    that pattern (case-insensitive LIKE).
-    """
-    cur = conn.cursor()
-
-    base_sql = """
-        SELECT li.part_number, COALESCE(SUM(li.quantity), 0.0) AS qty
-        FROM line_items li
-        JOIN invoices inv ON li.invoice_id = inv.id
-        JOIN suppliers s ON inv.supplier_id = s.id
-        WHERE NOT (s.name LIKE 'Mopar Canada%' OR s.type = 'chrysler_corp')
-          AND (s.type IS NULL OR s.type <> 'self')
+    Both sides go through ONE UNION ALL + GROUP BY on the normalized part,
+    SQLite computes the diff, and ROW_NUMBER() per section means only the
+    rows that will be printed are returned.
     """
+    conn.create_function("normalize_part", 1, normalize_part, deterministic=True)
 
+    billed_filter = received_filter = ""
     params: Tuple = ()
     if supplier_filter:
-        base_sql += " AND s.name LIKE ?"
-        params = (f"%{supplier_filter}%",)
-
-    base_sql += " GROUP BY li.part_number"
-
-    rows = cur.execute(base_sql, params).fetchall()
-
-    billed: Dict[str, float] = {}
-    for part, qty in rows:
-        if not part:
-            continue
-        key = normalize_part(part)
-        billed[key] = billed.get(key, 0.0) + (qty or 0.0)
-    return billed
-
-
-def load_manual_received_quantities(
-    conn: sqlite3.Connection,
-    supplier_filter: Optional[str],
-) -> Dict[str, float]:
-    """
-    Return {canonical_part_number: total_received_qty} from receipts_lines where
-    transcode = 'O' (manual/external supplier receipts).
-
-    If supplier_filter is provided, only include rows whose supplier_name
-    matches that pattern (case-insensitive LIKE).
-    """
-    cur = conn.cursor()
-
-    base_sql = """
-        SELECT part_number, COALESCE(SUM(qty_received), 0.0) AS qty
-        FROM receipts_lines
-        WHERE transcode = 'O'
+        billed_filter = " AND s.name LIKE ?"
+        received_filter = " AND supplier_name LIKE ?"
+        params = (f"%{supplier_filter}%", f"%{supplier_filter}%")
+
+    sql = f"""
+        WITH q AS (
+            SELECT normalize_part(li.part_number) AS part, li.quantity AS bq, 0.0 AS rq
+            FROM line_items li
+            JOIN invoices inv ON li.invoice_id = inv.id
+            JOIN suppliers s ON inv.supplier_id = s.id
+            WHERE NOT (s.name LIKE 'Mopar Canada%' OR s.type = 'chrysler_corp')
+              AND (s.type IS NULL OR s.type <> 'self')
+              AND li.part_number <> ''{billed_filter}
+            UNION ALL
+            SELECT normalize_part(part_number), 0.0, qty_received
+            FROM receipts_lines
+            WHERE transcode = 'O' AND part_number <> ''{received_filter}
+        ),
+        totals AS (
+            SELECT part, TOTAL(bq) AS bq, TOTAL(rq) AS rq, TOTAL(bq) - TOTAL(rq) AS diff
+            FROM q
+            GROUP BY part
+            HAVING ABS(diff) >= 1e-6
+        )
+        SELECT part, bq, rq, diff
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (
+                PARTITION BY diff > 0 ORDER BY ABS(diff) DESC, part
+            ) AS rn
+            FROM totals
+        )
+        WHERE rn <= ?
+        ORDER BY ABS(diff) DESC, part
     """
 
-    params: Tuple = ()
-    if supplier_filter:
-        base_sql += " AND supplier_name LIKE ?"
-        params = (f"%{supplier_filter}%",)
-
-    base_sql += " GROUP BY part_number"
-
-    rows = cur.execute(base_sql, params).fetchall()
-
-    rec: Dict[str, float] = {}
-    for part, qty in rows:
-        if not part:
-            continue
-        key = normalize_part(part)
-        rec[key] = rec.get(key, 0.0) + (qty or 0.0)
-    return rec
+    billed_more: List[Tuple[str, float, float, float]] = []
+    received_more: List[Tuple[str, float, float, float]] = []
+    for row in conn.execute(sql, params + (limit,)):
+        (billed_more if row[3] > 0 else received_more).append(row)
+    return billed_more, received_more
 
 
 def format_section(title: str, rows: List[Tuple[str, float, float, float]], limit: int) -> None:
-    print()
-    print(title)
-    print("-" * len(title))
-    print(f"{'Part #':<20} {'Billed':>10} {'Received':>10} {'Diff(b-r)':>10}")
-    print("-" * 60)
+    # Built up and written once rather than a print() per row
+    lines = [
+        "",
+        title,
+        "-" * len(title),
+        f"{'Part #':<20} {'Billed':>10} {'Received':>10} {'Diff(b-r)':>10}",
+        "-" * 60,
+    ]
     for part, billed, rec, diff in rows[:limit]:
-        print(f"{part:<20} {billed:>10.2f} {rec:>10.2f} {diff:>10.2f}")
-    print()
+        lines.append(f"{part:<20} {billed:>10.2f} {rec:>10.2f} {diff:>10.2f}")
+    lines.append("")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main() -> None:
@@ -143,30 +132,9 @@ def main() -> None:
 
     args = ap.parse_args()
 
-    conn = sqlite3.connect(args.db)
-
-    billed = load_external_billed_quantities(conn, args.supplier)
-    received = load_manual_received_quantities(conn, args.supplier)
-
-    all_parts = sorted(set(billed.keys()) | set(received.keys()))
-
-    billed_more: List[Tuple[str, float, float, float]] = []
-    received_more: List[Tuple[str, float, float, float]] = []
+    conn = open_db(args.db)
 
-    for part in all_parts:
-        bq = billed.get(part, 0.0)
-        rq = received.get(part, 0.0)
-        diff = bq - rq
-        if abs(diff) < 1e-6:
-            continue
-        if diff > 0:
-            billed_more.append((part, bq, rq, diff))
-        else:
-            received_more.append((part, bq, rq, diff))
-
-    # Sort by largest absolute difference
-    billed_more.sort(key=lambda r: r[3], reverse=True)
-    received_more.sort(key=lambda r: abs(r[3]), reverse=True)
+    billed_more, received_more = load_billed_vs_received(conn, args.supplier, args.limit)
 
     if args.supplier:
         print(f"Supplier filter: {args.supplier}")
@@ -12,14 +12,19 @@ Usage:
 """
 
 import argparse
-import sqlite3
+from collections import defaultdict
 from pathlib import Path
 
 from rich.console import Console
 from rich.table import Table
 
+from invoice_pipeline import open_db
+
 console = Console()
 
+# Invoice ids bound per IN (...) query, well under SQLite's variable limit
+ID_CHUNK = 500
+
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Show captured part numbers from invoices.db")
@@ -47,22 +52,19 @@ def main() -> int:
         console.print(f"[red]Database not found:[/red] {args.db}")
         return 1
 
-    conn = sqlite3.connect(str(args.db))
+    conn = open_db(args.db)
     cur = conn.cursor()
 
-    # Join invoices + suppliers + line_items
+    # Pick the invoices first so only their line items are fetched;
+    # --limit then bounds the transfer instead of slicing afterwards.
     query = """
         SELECT
             invoices.id,
             COALESCE(invoices.invoice_number, '?') AS inv_no,
             COALESCE(suppliers.name, '?') AS supplier,
-            COALESCE(invoices.invoice_date, '?') AS inv_date,
-            COALESCE(line_items.part_number, '') AS part_no,
-            COALESCE(line_items.description, '') AS desc,
-            COALESCE(line_items.line_total, '') AS line_total
+            COALESCE(invoices.invoice_date, '?') AS inv_date
         FROM invoices
         LEFT JOIN suppliers ON invoices.supplier_id = suppliers.id
-        LEFT JOIN line_items ON line_items.invoice_id = invoices.id
         WHERE 1 = 1
     """
 
@@ -71,47 +73,56 @@ def main() -> int:
         query += " AND invoices.invoice_number = ?"
         params.append(args.invoice)
 
-    query += " ORDER BY invoices.id, line_items.id"
+    query += " ORDER BY invoices.id DESC" if args.last else " ORDER BY invoices.id"
+    if args.limit is not None:
+        query += " LIMIT ?"
+        params.append(args.limit)
     cur.execute(query, params)
-    rows = cur.fetchall()
+    invoice_rows = cur.fetchall()
 
-    if not rows:
+    if not invoice_rows:
         console.print("[yellow]No line items found in database.[/yellow]")
         return 0
 
-    # Group by invoice_id in Python so we can show nice blocks
-    by_invoice = {}
-    for inv_id, inv_no, supplier, inv_date, part_no, desc, line_total in rows:
-        if inv_id not in by_invoice:
-            by_invoice[inv_id] = {
-                "invoice_number": inv_no,
-                "supplier": supplier,
-                "date": inv_date,
-                "lines": [],
-            }
-        by_invoice[inv_id]["lines"].append((part_no, desc, line_total))
-
     # invoices in ascending id (same as document order)
-    inv_items = list(by_invoice.items())
-
-    # Apply limit / last
-    if args.limit is not None:
-        if args.last:
-            inv_items = inv_items[-args.limit :]
-        else:
-            inv_items = inv_items[: args.limit]
-
-    for idx, (inv_id, data) in enumerate(inv_items, start=1):
-        title = f"Invoice ID {inv_id} — {data['supplier']} — #{data['invoice_number']} — {data['date']}"
+    if args.last:
+        invoice_rows.reverse()
+
+    # Group line items under their invoice so we can show nice blocks;
+    # header fields come from invoice_rows, once per invoice
+    lines_by_id = defaultdict(list)
+    inv_ids = [row[0] for row in invoice_rows]
+    for start in range(0, len(inv_ids), ID_CHUNK):
+        chunk = inv_ids[start : start + ID_CHUNK]
+        placeholders = ", ".join("?" * len(chunk))
+        cur.execute(
+            f"""
+            SELECT
+                invoice_id,
+                COALESCE(part_number, '') AS part_no,
+                COALESCE(description, '') AS desc,
+                COALESCE(line_total, '') AS line_total
+            FROM line_items
+            WHERE invoice_id IN ({placeholders})
+            ORDER BY invoice_id, id
+            """,
+            chunk,
+        )
+        for inv_id, part_no, desc, line_total in cur:
+            lines_by_id[inv_id].append((part_no, desc, line_total))
+
+    for idx, (inv_id, inv_no, supplier, inv_date) in enumerate(invoice_rows, start=1):
+        lines = lines_by_id[inv_id]
+        title = f"Invoice ID {inv_id} — {supplier} — #{inv_no} — {inv_date}"
         table = Table(title=title)
         table.add_column("Part #", style="cyan", no_wrap=True)
         table.add_column("Description", style="white")
         table.add_column("Line total", justify="right")
 
-        if not data["lines"]:
+        if not lines:
             table.add_row("[dim]<no line items>[/dim]", "", "")
         else:
-            for part_no, desc, line_total in data["lines"]:
+            for part_no, desc, line_total in lines:
                 # line_total can be REAL or empty string
                 if isinstance(line_total, float):
                     total_str = f"{line_total:.2f}"
@@ -127,7 +138,7 @@ def main() -> int:
                 )
 
         console.print(table)
-        if idx != len(inv_items):
+        if idx != len(invoice_rows):
             console.print()  # blank line between invoices
 
     return 0
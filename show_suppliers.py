@@ -13,9 +13,36 @@ Print all suppliers currently in invoices.db with:
 from __future__ import annotations
 
 import argparse
-import sqlite3
+import sys
 from pathlib import Path
 
+from invoice_pipeline import open_db
+
+SUPPLIER_ROWS_SQL = """
+    SELECT
+        s.id,
+        s.name,
+        s.type,
+        COALESCE(st.invoice_count, 0) AS invoice_count,
+        COALESCE(st.total_billed, 0.0) AS total_billed
+    FROM suppliers s
+    LEFT JOIN supplier_stats st ON st.supplier_id = s.id
+    ORDER BY s.name COLLATE NOCASE;
+"""
+
+SUPPLIER_ROWS_AGGREGATE_SQL = """
+    SELECT
+        s.id,
+        s.name,
+        s.type,
+        COUNT(inv.id) AS invoice_count,
+        COALESCE(SUM(inv.total), 0.0) AS total_billed
+    FROM suppliers s
+    LEFT JOIN invoices inv ON inv.supplier_id = s.id
+    GROUP BY s.id, s.name, s.type
+    ORDER BY s.name COLLATE NOCASE;
+"""
+
 
 def main() -> None:
     ap = argparse.ArgumentParser(
@@ -29,36 +56,31 @@ def main() -> None:
     )
     args = ap.parse_args()
 
-    conn = sqlite3.connect(args.db)
+    conn = open_db(args.db)
     cur = conn.cursor()
 
-    rows = cur.execute(
-        """
-        SELECT
-            s.id,
-            s.name,
-            s.type,
-            COUNT(inv.id) AS invoice_count,
-            COALESCE(SUM(inv.total), 0.0) AS total_billed
-        FROM suppliers s
-        LEFT JOIN invoices inv ON inv.supplier_id = s.id
-        GROUP BY s.id, s.name, s.type
-        ORDER BY s.name COLLATE NOCASE;
-        """
-    ).fetchall()
+    # supplier_stats is maintained by triggers (see invoice_pipeline.init_db);
+    # databases not opened by the pipeline since it was added fall back to
+    # aggregating invoices directly.
+    has_stats = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'supplier_stats'"
+    ).fetchone()
+    rows = cur.execute(SUPPLIER_ROWS_SQL if has_stats else SUPPLIER_ROWS_AGGREGATE_SQL).fetchall()
 
     conn.close()
 
-    print(
+    # Built up and written once rather than a print() per row
+    out = [
         f"{'ID':>3}  {'Supplier':<30}  {'Type':<15}  "
-        f"{'Invoices':>8}  {'Total billed':>12}"
-    )
-    print("-" * 80)
+        f"{'Invoices':>8}  {'Total billed':>12}",
+        "-" * 80,
+    ]
     for sid, name, stype, inv_count, total in rows:
-        print(
+        out.append(
             f"{sid:>3}  {name[:30]:<30}  {str(stype or '')[:15]:<15}  "
             f"{inv_count:>8}  {total:>12.2f}"
         )
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,30 @@
+import PyPDF2
+import pytest
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+
+def _write_text_pdf(path, texts):
+    writer = PyPDF2.PdfWriter()
+    font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    })
+    for text in texts:
+        page = PyPDF2.PageObject.create_blank_page(width=612, height=792)
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1"))
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+        })
+        writer.add_page(page)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+
+@pytest.fixture
+def text_pdf():
+    """text_pdf(path, texts): a PDF with one line of Helvetica text per page."""
+    return _write_text_pdf
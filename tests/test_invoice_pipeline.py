@@ -0,0 +1,347 @@
+import os
+import random
+import re
+import sqlite3
+import stat
+
+import PyPDF2
+import pytest
+
+import invoice_pipeline as ip
+
+
+def napa_page(number: str) -> str:
+    return (
+        "NAPA PORT KELLS\n"
+        f"Invoice Number {number}\n"
+        "Date 11/06/2025\n"
+        "1 NCP 2615021 BRAKE PADS 2 45.10 90.20\n"
+    )
+
+
+def test_recurring_invoice_number_is_merged():
+    # 397-190100 on pages 1-2 and again on page 12, with other invoices between
+    pages = [napa_page("397-190100"), napa_page("397-190100")]
+    pages += [napa_page(f"397-19020{i}") for i in range(9)]
+    pages.append(napa_page("397-190100"))
+
+    invoices = ip.split_into_invoices(pages)
+
+    assert len(invoices) == 10
+    assert invoices[0].invoice_number == "397-190100"
+    assert invoices[0].pages == [0, 1, 11]
+    assert [inv.invoice_number for inv in invoices].count("397-190100") == 1
+
+    names = [ip._invoice_pdf_name(idx, inv) for idx, inv in enumerate(invoices, start=1)]
+    assert len(set(names)) == len(names)
+
+
+def blank_scan(tmp_path, n_pages):
+    writer = PyPDF2.PdfWriter()
+    for _ in range(n_pages):
+        writer.add_blank_page(width=612, height=792)
+    scan = tmp_path / "scan.pdf"
+    with scan.open("wb") as f:
+        writer.write(f)
+    return scan
+
+
+def test_cli_keeps_pages_of_recurring_invoice(tmp_path, monkeypatch):
+    pages = [napa_page("397-190100"), napa_page("397-190100")]
+    pages += [napa_page(f"397-19020{i}") for i in range(9)]
+    pages.append(napa_page("397-190100"))
+    scan = blank_scan(tmp_path, len(pages))
+
+    monkeypatch.setattr(ip, "iter_page_texts", lambda *a, **k: enumerate(pages))
+    out_dir = tmp_path / "out"
+    db = tmp_path / "invoices.db"
+    assert ip.main([str(scan), "--no-ocr", "--no-cache", "--output-dir", str(out_dir), "--db", str(db)]) == 0
+
+    conn = sqlite3.connect(db)
+    rows = conn.execute(
+        "SELECT pdf_path FROM invoices WHERE invoice_number = '397-190100'"
+    ).fetchall()
+    assert conn.execute("SELECT COUNT(*) FROM invoices").fetchone()[0] == 10
+    assert len(rows) == 1
+    assert len(PyPDF2.PdfReader(rows[0][0]).pages) == 3
+
+
+def test_cli_prints_summary_when_db_fails(tmp_path, monkeypatch, capsys):
+    pages = [napa_page("397-190100"), napa_page("397-190101")]
+    scan = blank_scan(tmp_path, len(pages))
+    monkeypatch.setattr(ip, "iter_page_texts", lambda *a, **k: enumerate(pages))
+
+    def broken_init_db(path, pragmas=()):
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(ip, "init_db", broken_init_db)
+    out_dir = tmp_path / "out"
+    with pytest.raises(sqlite3.OperationalError):
+        ip.main([str(scan), "--no-ocr", "--no-cache", "--output-dir", str(out_dir), "--db", str(tmp_path / "x.db")])
+
+    assert "Extracted invoices" in capsys.readouterr().out
+    assert len(list(out_dir.glob("*.pdf"))) == 2
+
+
+def test_parallel_page_texts_match_serial(tmp_path, monkeypatch, text_pdf):
+    scan = text_pdf(tmp_path / "scan.pdf", [f"page {i}" for i in range(23)])
+    monkeypatch.setattr(ip, "PARALLEL_MIN_PAGES", 2)
+
+    serial = list(ip.iter_page_texts(scan, workers=1))
+    assert [text for _, text in serial] == [f"page {i}" for i in range(23)]
+    assert list(ip.iter_page_texts(scan, workers=2)) == serial
+
+    # Stopping early shuts the pool down instead of hanging
+    pages = ip.iter_page_texts(scan, workers=2)
+    assert next(pages) == (0, "page 0")
+    pages.close()
+
+
+def test_pdf_split_matches_serial_writer(tmp_path, monkeypatch, text_pdf):
+    numbers = [f"397-1902{i:02d}" for i in range(20)]
+    texts = [f"Invoice Number {numbers[i // 2 % 20]} page {i}" for i in range(40)]
+    texts.append(f"Invoice Number {numbers[0]} page 40")
+    scan = text_pdf(tmp_path / "scan.pdf", texts)
+    invoices = ip.split_into_invoices(
+        [napa_page(n) for n in [numbers[i // 2 % 20] for i in range(40)] + [numbers[0]]]
+    )
+    assert len(invoices) == 20
+    assert invoices[0].pages == [0, 1, 40]
+
+    monkeypatch.setattr(ip, "PDF_WRITE_THREADS", 3)
+    paths = ip.save_invoices_as_pdfs(PyPDF2.PdfReader(str(scan)), invoices, tmp_path / "out")
+
+    reader = PyPDF2.PdfReader(str(scan))
+    for inv, path in zip(invoices, paths):
+        writer = PyPDF2.PdfWriter()
+        for pidx in inv.pages:
+            writer.add_page(reader.pages[pidx])
+        expected = tmp_path / "expected.pdf"
+        with expected.open("wb") as f:
+            writer.write(f)
+        assert path.read_bytes() == expected.read_bytes()
+
+
+def test_open_db_is_read_only(tmp_path):
+    db = tmp_path / "invoices.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE suppliers (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.commit()
+    conn.close()
+
+    conn = ip.open_db(db)
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("INSERT INTO suppliers(name) VALUES ('x')")
+    conn.close()
+
+    assert sqlite3.connect(db).execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["invoices.db"]
+
+
+def test_init_db_keeps_default_transactions(tmp_path):
+    db = tmp_path / "invoices.db"
+    inv = ip.split_into_invoices([napa_page("397-190100")])[0]
+
+    conn = ip.init_db(db)
+    assert conn.isolation_level == ""
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    ip.insert_invoice_into_db(conn, inv, tmp_path / "a.pdf")
+    assert not conn.in_transaction
+
+    # A caller's own pending write is committed along with the invoice
+    conn.execute("INSERT INTO suppliers(name, type) VALUES ('Other', 'x')")
+    ip.insert_invoice_into_db(conn, inv, tmp_path / "b.pdf")
+    with pytest.raises(ZeroDivisionError):
+        with ip.transaction(conn):
+            conn.execute("INSERT INTO suppliers(name, type) VALUES ('Lost', 'x')")
+            1 / 0
+    conn.close()
+
+    check = sqlite3.connect(db)
+    assert check.execute("SELECT COUNT(*) FROM invoices").fetchone()[0] == 2
+    assert check.execute("SELECT COUNT(*) FROM line_items").fetchone()[0] == 2
+    names = {row[0] for row in check.execute("SELECT name FROM suppliers")}
+    assert "Other" in names and "Lost" not in names
+    check.close()
+
+    ip.init_db(db, ip.INGEST_PRAGMAS).close()
+    assert sqlite3.connect(db).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def supplier_stats_mismatches(conn):
+    return conn.execute(
+        """
+        SELECT s.id, COALESCE(st.invoice_count, 0), COALESCE(st.total_billed, 0.0),
+               COUNT(inv.id), COALESCE(SUM(inv.total), 0.0)
+        FROM suppliers s
+        LEFT JOIN supplier_stats st ON st.supplier_id = s.id
+        LEFT JOIN invoices inv ON inv.supplier_id = s.id
+        GROUP BY s.id
+        HAVING COALESCE(st.invoice_count, 0) <> COUNT(inv.id)
+            OR ABS(COALESCE(st.total_billed, 0.0) - COALESCE(SUM(inv.total), 0.0)) > 1e-9
+        """
+    ).fetchall()
+
+
+def test_supplier_stats_follow_invoices(tmp_path):
+    db = tmp_path / "invoices.db"
+    conn = ip.init_db(db)
+    invoices = ip.split_into_invoices([napa_page(f"397-19010{i}") for i in range(4)])
+    ip.insert_invoices_into_db(conn, [(inv, tmp_path / "x.pdf") for inv in invoices])
+    other = ip.upsert_supplier(conn, "Lordco Auto Parts", "lordco")
+    conn.commit()
+    assert supplier_stats_mismatches(conn) == []
+
+    steps = [
+        "UPDATE invoices SET total = total + 10.25 WHERE id = 1",
+        "UPDATE invoices SET total = total WHERE id = 2",
+        "UPDATE invoices SET po_number = 'PO1' WHERE id = 3",
+        f"UPDATE invoices SET supplier_id = {other} WHERE id = 2",
+        "UPDATE invoices SET total = NULL WHERE id = 3",
+        "UPDATE invoices SET supplier_id = NULL WHERE id = 4",
+        "UPDATE invoices SET supplier_id = 1 WHERE id = 4",
+        "DELETE FROM line_items WHERE invoice_id = 1",
+        "DELETE FROM invoices WHERE id = 1",
+    ]
+    for sql in steps:
+        with ip.transaction(conn):
+            conn.execute(sql)
+        assert supplier_stats_mismatches(conn) == [], sql
+    conn.close()
+
+    # Drift (e.g. a trigger dropped by hand) is repaired on the next open
+    conn = sqlite3.connect(db)
+    conn.execute("DROP TRIGGER trg_invoices_stats_ad")
+    conn.execute("DELETE FROM invoices WHERE id = 2")
+    conn.execute("UPDATE supplier_stats SET invoice_count = 7 WHERE supplier_id = 1")
+    conn.commit()
+    conn.close()
+    conn = ip.init_db(db)
+    assert supplier_stats_mismatches(conn) == []
+    conn.execute("UPDATE supplier_stats SET invoice_count = 7 WHERE supplier_id = 1")
+    conn.commit()
+    conn.close()
+    conn = ip.init_db(db)
+    assert supplier_stats_mismatches(conn) == []
+    conn.close()
+
+    # Opening an up-to-date DB does not write: it works while another
+    # connection holds the write lock
+    locker = sqlite3.connect(db, isolation_level=None)
+    locker.execute("BEGIN IMMEDIATE")
+    conn = ip.init_db(db)
+    assert conn.total_changes == 0
+    conn.close()
+    locker.execute("ROLLBACK")
+
+
+@pytest.mark.parametrize("n_rows", [0, 1, ip.LINE_ITEM_CHUNK, 2 * ip.LINE_ITEM_CHUNK, 2 * ip.LINE_ITEM_CHUNK + 7])
+def test_insert_line_items_in_chunks(tmp_path, n_rows):
+    conn = ip.init_db(tmp_path / "invoices.db")
+    with ip.transaction(conn):
+        conn.executemany("INSERT INTO invoices(id) VALUES (?)", [(1,), (2,), (3,)])
+    rows = [
+        (1 + i % 3, f"P{i:04d}", f"item {i}", float(i), 1.5, 1.5 * i, f"raw {i}")
+        for i in range(n_rows)
+    ]
+    with ip.transaction(conn):
+        ip._insert_line_items(conn, rows)
+
+    stored = conn.execute(
+        """
+        SELECT invoice_id, part_number, description, quantity, unit_price, line_total, raw_line
+        FROM line_items ORDER BY id
+        """
+    ).fetchall()
+    assert stored == rows
+    conn.close()
+
+
+def test_page_text_cache_is_private_and_reused(tmp_path, monkeypatch):
+    pdf = tmp_path / "scan.pdf"
+    pdf.write_bytes(b"%PDF-1.4 not really")
+    calls = []
+
+    def fake_iter_page_texts(pdf_path, workers=None, reader=None):
+        calls.append(pdf_path)
+        return enumerate(["page one", "page two"])
+
+    monkeypatch.setattr(ip, "iter_page_texts", fake_iter_page_texts)
+    cache_dir = tmp_path / "cache" / "page_texts"
+    cache_dir.mkdir(parents=True)
+    cache_dir.chmod(0o755)
+    stale = cache_dir / ("0" * 40 + "-pypdf2.jsonl")
+    stale.write_text("")
+    os.utime(stale, (0, 0))
+
+    for _ in range(2):
+        assert list(ip.cached_page_texts(pdf, cache_dir)) == [(0, "page one"), (1, "page two")]
+    assert len(calls) == 1
+
+    assert stat.S_IMODE(cache_dir.stat().st_mode) == 0o700
+    (entry,) = cache_dir.iterdir()
+    assert stat.S_IMODE(entry.stat().st_mode) == 0o600
+
+
+def test_page_text_cache_falls_back_on_errors(tmp_path, monkeypatch):
+    pdf = tmp_path / "scan.pdf"
+    pdf.write_bytes(b"%PDF-1.4 not really")
+    calls = []
+
+    def fake_iter_page_texts(pdf_path, workers=None, reader=None):
+        calls.append(pdf_path)
+        return enumerate(["page one"])
+
+    monkeypatch.setattr(ip, "iter_page_texts", fake_iter_page_texts)
+
+    # Cache "directory" that is a file: extract without caching
+    not_a_dir = tmp_path / "cache"
+    not_a_dir.write_text("")
+    assert list(ip.cached_page_texts(pdf, not_a_dir)) == [(0, "page one")]
+
+    # Corrupt entry: re-extract and replace it
+    cache_dir = tmp_path / "page_texts"
+    assert list(ip.cached_page_texts(pdf, cache_dir)) == [(0, "page one")]
+    (entry,) = cache_dir.iterdir()
+    entry.write_text("not json\n")
+    assert list(ip.cached_page_texts(pdf, cache_dir)) == [(0, "page one")]
+    assert list(ip.cached_page_texts(pdf, cache_dir)) == [(0, "page one")]
+    assert len(calls) == 3
+
+    # A new cache version is a miss
+    monkeypatch.setattr(ip, "PAGE_TEXT_CACHE_VERSION", ip.PAGE_TEXT_CACHE_VERSION + 1)
+    assert list(ip.cached_page_texts(pdf, cache_dir)) == [(0, "page one")]
+    assert len(calls) == 4
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+@pytest.mark.parametrize(
+    "raw, cleaned",
+    [
+        ("** Internet  Order  **TIE ROD END Method Date Terms", "TIE ROD END"),
+        # "Method Date Terms" only appears once "Internet Order" is removed
+        ("method internet order date terms", ""),
+        ("BALL JOINT Method Internet Order Date Terms xx", "BALL JOINT"),
+        ("1 **Internet**Order 5 PADS", "5 PADS"),
+    ],
+)
+def test_normalize_lordco_description(raw, cleaned):
+    assert ip._normalize_lordco_description(raw) == cleaned
+
+
+def original_normalize_lordco_description(desc):
+    """_normalize_lordco_description as it was before the regex rework."""
+    s = re.sub(r"\*+", " ", desc)
+    s = re.sub(r"\b[Ii]nternet\b\s+\b[Oo]rder\b", " ", s)
+    s = re.sub(r"\b[Mm]ethod\b\s+\b[Dd]ate\b\s+\b[Tt]erms\b.*", "", s)
+    s = re.sub(r"^\s*\d+\s+", " ", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def test_normalize_lordco_description_matches_original():
+    tokens = ["*", "**", " ", "  ", "\t", "Internet", "internet", "INTERNET", "Order", "order",
+              "Method", "method", "Date", "date", "Terms", "terms", "1", "23", "TIE", "ROD", "x"]
+    rng = random.Random(4)
+    for _ in range(5000):
+        raw = "".join(rng.choice(tokens) for _ in range(rng.randint(1, 10)))
+        assert ip._normalize_lordco_description(raw) == original_normalize_lordco_description(raw), raw
@@ -0,0 +1,101 @@
+import random
+
+import parse_fca_invoice as fca
+
+
+def test_order_header_fields_in_any_order():
+    ctx = fca.parse_order_header("0310300-1234 ORD#: 4567890  DATE: 2025-11-05  O/T:E")
+    assert ctx.location == "0310300-1234"
+    assert ctx.order_number == "4567890"
+    assert ctx.order_type == "E"
+    assert ctx.order_date == "2025-11-05"
+
+
+def test_order_header_takes_last_order_type():
+    ctx = fca.parse_order_header("0310300-3618853 O/T:A ORD#: T1103F  O/T:E DATE:  2025-11-03")
+    assert ctx.order_number == "T1103F"
+    assert ctx.order_type == "E"
+    assert ctx.order_date == "2025-11-03"
+
+
+def original_parse_order_header(line):
+    """parse_order_header as it was before the regex rewrite."""
+    if "ORD#:" not in line or "DATE:" not in line:
+        return None
+    tokens = line.split()
+    if not tokens:
+        return None
+    order_number = order_type = order_date = None
+    if "ORD#:" in tokens:
+        idx = tokens.index("ORD#:") + 1
+        if idx < len(tokens):
+            order_number = tokens[idx]
+    for tok in tokens:
+        if tok.startswith("O/T:"):
+            order_type = tok.split(":", 1)[1] or None
+    if "DATE:" in tokens:
+        idx = tokens.index("DATE:") + 1
+        if idx < len(tokens):
+            order_date = tokens[idx]
+    return fca.FCAContext(
+        location=tokens[0],
+        order_number=order_number,
+        order_type=order_type,
+        order_date=order_date,
+    )
+
+
+def test_order_header_matches_original():
+    tokens = ["0310300-3618853", "ORD#:", "T1103F", "O/T:E", "O/T:", "DATE:", "2025-11-03",
+              "X", "ORD#:A", "DATE:2025", "O/T:XO/T:", "\t"]
+    rng = random.Random(7)
+    for _ in range(5000):
+        parts = [rng.choice(tokens) for _ in range(rng.randint(0, 9))]
+        line = rng.choice(["", " "]) + rng.choice([" ", "  "]).join(parts)
+        assert fca.parse_order_header(line) == original_parse_order_header(line), line
+
+
+def original_parse_mopar_part_line(raw_line):
+    """parse_mopar_part_line as it was before the rsplit rewrite."""
+    tokens = raw_line.split()
+    if len(tokens) < 11 or not tokens[0].isdigit():
+        return None
+
+    def to_float(s):
+        s = s.replace(",", "")
+        if s == "." or s == "":
+            return 0.0
+        if s.startswith("."):
+            s = "0" + s
+        return float(s)
+
+    description = " ".join(tokens[2 : len(tokens) - 8]).strip()
+    try:
+        qty = to_float(tokens[-8])
+        unit_price = to_float(tokens[-7])
+        gross = to_float(tokens[-6])
+        net = to_float(tokens[-2])
+    except ValueError:
+        return None
+    return tokens[0], tokens[1], description, qty, unit_price, gross, net, tokens[-1]
+
+
+def test_mopar_part_line():
+    line = "1 0BAAUA200AB BATTERY   BIG    10    193.05   1,930.50 22  0       .00   1930.50 B"
+    assert fca.parse_mopar_part_line(line) == (
+        "1", "0BAAUA200AB", "BATTERY BIG", 10.0, 193.05, 1930.5, 1930.5, "B",
+    )
+    # No description: one token short
+    assert fca.parse_mopar_part_line("1 0BAAUA200AB 10 193.05 1930.50 22 0 .00 1930.50 B") is None
+    assert fca.parse_mopar_part_line("A 0BAAUA200AB X 10 193.05 1930.50 22 0 .00 1930.50 B") is None
+
+
+def test_mopar_part_line_matches_original():
+    tokens = ["1", "12", "0BAAUA200AB", "BATTERY", "BIG", "10", "193.05", "1,930.50", ".65",
+              ".", "0", "-2", "x1", "B", "\t"]
+    rng = random.Random(7)
+    for _ in range(5000):
+        parts = [rng.choice(["1", "12", "x1"])]
+        parts += [rng.choice(tokens) for _ in range(rng.randint(8, 13))]
+        line = rng.choice(["", "  "]) + rng.choice([" ", "   "]).join(parts) + rng.choice(["", " "])
+        assert fca.parse_mopar_part_line(line) == original_parse_mopar_part_line(line), line
@@ -0,0 +1,149 @@
+import pytest
+
+import import_receipts
+import invoice_pipeline as ip
+import report_fca_billed_vs_received as fca_report
+import report_manual_billed_vs_received as manual_report
+
+SUPPLIERS = [
+    (1, "Mopar Canada Inc", "chrysler_corp"),
+    (2, "NAPA Port Kells", "napa"),
+    (3, "Lordco Auto Parts", "lordco"),
+    (4, "Our Shop", "self"),
+]
+
+# (supplier_id, part_number, quantity)
+BILLED = [
+    (1, "0VU01321AC", 5), (1, "VU01321-AC", 1),   # same part once normalized
+    (1, "68000001AA", 2),                          # fully received
+    (1, "68000002AA", 3),
+    (1, "68000003AA", 1),
+    (1, "68000004AA", 2),                          # never received
+    (1, "68000006AA", 2), (1, "68000006AA", -2),   # credited to zero
+    (1, "", 9),
+    (2, "NCP 2615021", 2), (2, "ncp-2615021", 1),
+    (2, "BP1", 4),
+    (3, "LOR-1", 1),
+    (3, "BP1", 1),
+    (4, "SELF-1", 5),
+]
+
+# (transcode, supplier_name, part_number, qty_received)
+RECEIVED = [
+    ("R", None, "VU01321AC", 2),
+    ("R", None, "68000001AA", 2),
+    ("R", None, "68000002AA", 1),
+    ("R", None, "068000003AA", 4),
+    ("R", None, "68000005AA", 3),                  # never billed
+    ("O", "NAPA", "NCP2615021", 1),
+    ("O", "NAPA", "BP1", 9),
+    ("O", "Lordco", "LOR-1", 1),
+    ("O", "Lordco", "LOR-2", 2),
+    ("O", "NAPA", "SELF-1", 5),
+]
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "invoices.db"
+    conn = ip.init_db(path)
+    import_receipts.ensure_receipts_schema(conn)
+    with ip.transaction(conn):
+        conn.executemany("INSERT INTO suppliers(id, name, type) VALUES (?, ?, ?)", SUPPLIERS)
+        conn.executemany(
+            "INSERT INTO invoices(id, supplier_id) VALUES (?, ?)",
+            [(sid, sid) for sid, _, _ in SUPPLIERS],
+        )
+        conn.executemany(
+            "INSERT INTO line_items(invoice_id, part_number, quantity) VALUES (?, ?, ?)",
+            BILLED,
+        )
+        conn.executemany(
+            "INSERT INTO receipts_lines(transcode, supplier_name, part_number, qty_received)"
+            " VALUES (?, ?, ?, ?)",
+            RECEIVED,
+        )
+    conn.close()
+    conn = ip.open_db(path)
+    yield conn
+    conn.close()
+
+
+def reference(billed_rows, received_rows, limit):
+    """The reports' original dict-and-sort reconciliation, in plain Python."""
+    billed, received = {}, {}
+    for part, qty in billed_rows:
+        if part:
+            key = ip.normalize_part(part)
+            billed[key] = billed.get(key, 0.0) + qty
+    for part, qty in received_rows:
+        if part:
+            key = ip.normalize_part(part)
+            received[key] = received.get(key, 0.0) + qty
+
+    billed_more, received_more = [], []
+    for part in sorted(set(billed) | set(received)):
+        bq = billed.get(part, 0.0)
+        rq = received.get(part, 0.0)
+        diff = bq - rq
+        if abs(diff) < 1e-6:
+            continue
+        (billed_more if diff > 0 else received_more).append((part, bq, rq, diff))
+    billed_more.sort(key=lambda r: r[3], reverse=True)
+    received_more.sort(key=lambda r: abs(r[3]), reverse=True)
+    return billed_more[:limit], received_more[:limit]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 100])
+def test_fca_billed_vs_received(db, limit):
+    expected = reference(
+        [(part, qty) for sid, part, qty in BILLED if sid == 1],
+        [(part, qty) for code, _, part, qty in RECEIVED if code == "R"],
+        limit,
+    )
+    assert fca_report.load_billed_vs_received(db, limit) == expected
+
+
+def test_fca_billed_vs_received_rows(db):
+    billed_more, received_more = fca_report.load_billed_vs_received(db, 100)
+    assert billed_more == [
+        ("VU01321AC", 6.0, 2.0, 4.0),
+        ("68000002AA", 3.0, 1.0, 2.0),
+        ("68000004AA", 2.0, 0.0, 2.0),
+    ]
+    assert received_more == [
+        ("68000003AA", 1.0, 4.0, -3.0),
+        ("68000005AA", 0.0, 3.0, -3.0),
+    ]
+
+
+@pytest.mark.parametrize("supplier_filter", [None, "napa", "Lordco"])
+@pytest.mark.parametrize("limit", [1, 100])
+def test_manual_billed_vs_received(db, supplier_filter, limit):
+    names = {sid: name for sid, name, _ in SUPPLIERS}
+
+    def wanted(name):
+        return not supplier_filter or supplier_filter.lower() in name.lower()
+
+    expected = reference(
+        [
+            (part, qty) for sid, part, qty in BILLED
+            if sid in (2, 3) and wanted(names[sid])
+        ],
+        [
+            (part, qty) for code, name, part, qty in RECEIVED
+            if code == "O" and wanted(name)
+        ],
+        limit,
+    )
+    assert manual_report.load_billed_vs_received(db, supplier_filter, limit) == expected
+
+
+def test_manual_billed_vs_received_rows(db):
+    billed_more, received_more = manual_report.load_billed_vs_received(db, None, 100)
+    assert billed_more == [("NCP2615021", 3.0, 1.0, 2.0)]
+    assert received_more == [
+        ("SELF1", 0.0, 5.0, -5.0),
+        ("BP1", 5.0, 9.0, -4.0),
+        ("LOR2", 0.0, 2.0, -2.0),
+    ]
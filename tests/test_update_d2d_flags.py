@@ -0,0 +1,132 @@
+import random
+import sqlite3
+import sys
+
+import PyPDF2
+import pytest
+
+import update_d2d_flags as d2d
+
+
+def test_failed_scan_is_not_cacheable(tmp_path, capsys):
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+    assert d2d._scan_for_cache(str(broken)) == ((False, None), False)
+    assert "Error reading" in capsys.readouterr().out
+
+    blank = tmp_path / "blank.pdf"
+    writer = PyPDF2.PdfWriter()
+    writer.add_blank_page(width=612, height=792)
+    with blank.open("wb") as f:
+        writer.write(f)
+    assert d2d._scan_for_cache(str(blank)) == ((False, None), True)
+
+
+def original_detect(texts):
+    """The original whole-document D2D check, on already extracted page text."""
+    combined_text = " ".join(texts).upper()
+    is_d2d = "D2D" in combined_text or "D 2 D" in combined_text or "D-2-D" in combined_text
+    d2d_type = None
+    if is_d2d:
+        if "D2D OBSOLETE" in combined_text or "D 2 D OBSOLETE" in combined_text:
+            d2d_type = "OBSOLETE"
+        elif "D2D GUARANTEED" in combined_text or "D 2 D GUARANTEED" in combined_text:
+            d2d_type = "GUARANTEED_INV"
+        elif "D2D BACKORDER" in combined_text or "D 2 D BACKORDER" in combined_text:
+            d2d_type = "BACKORDER"
+    return is_d2d, d2d_type
+
+
+@pytest.mark.parametrize(
+    "texts, expected",
+    [
+        (["nothing to see"], (False, None)),
+        (["part d2d obsolete"], (True, "OBSOLETE")),
+        (["D 2 d Guaranteed"], (True, "GUARANTEED_INV")),
+        (["d-2-d backorder"], (True, None)),
+        (["D2DOBSOLETE"], (True, None)),
+        (["D2D BACKORDER", "x D 2 D GUARANTEED"], (True, "GUARANTEED_INV")),
+        (["d2d backorder", "x", "D2D OBSOLETE"], (True, "OBSOLETE")),
+        # Markers split across a page break (pages are joined with " ")
+        (["parts D", "2 D GUARANTEED"], (True, "GUARANTEED_INV")),
+        (["parts D 2 D", "obsolete"], (True, "OBSOLETE")),
+        (["parts D2D", "BACKORDER here"], (True, "BACKORDER")),
+        (["x D", "2D BACKORDER"], (False, None)),
+        (["x D2", "D"], (False, None)),
+    ],
+)
+def test_scan_d2d(tmp_path, text_pdf, texts, expected):
+    assert original_detect(texts) == expected
+    pdf = text_pdf(tmp_path / "inv.pdf", texts)
+    assert d2d._scan_d2d(str(pdf)) == expected
+
+
+def test_d2d_re_matches_original_markers():
+    tokens = ["D", "d", "2", "D2D", "d2d", "D 2 D", "D-2-D", "OBSOLETE", "guaranteed",
+              "Backorder", "x", "D2", "2D", ""]
+    rng = random.Random(6)
+    for _ in range(5000):
+        text = " ".join(rng.choice(tokens) for _ in range(rng.randint(0, 8)))
+        found = [(m.group(1) or "").upper() for m in d2d.D2D_RE.finditer(text)]
+        d2d_type = next(
+            (d2d.D2D_TYPES[m] for m in ("OBSOLETE", "GUARANTEED", "BACKORDER") if m in found),
+            None,
+        )
+        assert (bool(found), d2d_type) == original_detect([text]), text
+
+
+def test_scan_d2d_matches_original_across_pages(tmp_path, text_pdf):
+    tokens = ["D", "2", "D2D", "D 2 D", "OBSOLETE", "GUARANTEED", "BACKORDER", "x"]
+    rng = random.Random(6)
+    for i in range(40):
+        texts = [
+            " ".join(rng.choice(tokens) for _ in range(rng.randint(1, 4)))
+            for _ in range(rng.randint(1, 4))
+        ]
+        pdf = text_pdf(tmp_path / f"inv{i}.pdf", texts)
+        assert d2d._scan_d2d(str(pdf)) == original_detect(texts), texts
+
+
+def test_pdf_cache_key_of_missing_file(tmp_path):
+    missing = tmp_path / "gone.pdf"
+    assert d2d.pdf_cache_key(str(missing)) == (str(missing), None, None)
+
+
+def test_d2d_cache_is_tied_to_the_detector(tmp_path, monkeypatch, capsys, text_pdf):
+    monkeypatch.chdir(tmp_path)
+    text_pdf(tmp_path / "a.pdf", ["D2D OBSOLETE"])
+    text_pdf(tmp_path / "b.pdf", ["nothing"])
+    conn = sqlite3.connect("invoices.db")
+    conn.execute(
+        "CREATE TABLE invoice (id INTEGER PRIMARY KEY, invoice_number TEXT,"
+        " pdf_path TEXT, is_d2d BOOLEAN, d2d_type TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO invoice VALUES (?, ?, ?, 0, NULL)",
+        [(1, "A1", "a.pdf"), (2, "B1", "b.pdf")],
+    )
+    # Cache table from before the detector column
+    conn.execute(
+        "CREATE TABLE d2d_cache (path TEXT PRIMARY KEY, mtime_ns INTEGER,"
+        " size INTEGER, is_d2d INTEGER, d2d_type TEXT)"
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(sys, "argv", ["update_d2d_flags.py", "--workers", "1"])
+
+    d2d.main()
+    assert "unchanged since the last run" not in capsys.readouterr().out
+    conn = sqlite3.connect("invoices.db")
+    assert conn.execute("SELECT is_d2d, d2d_type FROM invoice ORDER BY id").fetchall() == [
+        (1, "OBSOLETE"),
+        (0, None),
+    ]
+    assert {row[0] for row in conn.execute("SELECT detector FROM d2d_cache")} == {d2d.D2D_DETECTOR}
+    conn.close()
+
+    d2d.main()
+    assert "Scanning 0 PDF(s); 2 unchanged" in capsys.readouterr().out
+
+    monkeypatch.setattr(d2d, "D2D_DETECTOR", "changed")
+    d2d.main()
+    assert "unchanged since the last run" not in capsys.readouterr().out
@@ -4,17 +4,115 @@ Retroactively update D2D flags for existing invoices/credit memos
 by checking their PDF files.
 """
 
-import sys
-sys.path.insert(0, '.')
-
-from sqlmodel import Session, create_engine, select
-from core.models import Invoice
+import argparse
+import hashlib
+import os
+import sqlite3
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
 from PyPDF2 import PdfReader
 import re
 from pathlib import Path
 
-DATABASE_URL = "sqlite:///invoices.db"
-engine = create_engine(DATABASE_URL, echo=False)
+# Same database and `invoice` table as core.models.Invoice. This is a bulk
+# maintenance job, so it reads and writes the flag columns with plain
+# sqlite3 instead of loading every row through the ORM.
+DATABASE_PATH = Path("invoices.db")
+
+
+class InvoiceFlags(NamedTuple):
+    id: int
+    invoice_number: str
+    pdf_path: str | None
+    is_d2d: bool
+    d2d_type: str | None
+
+
+# Results of detect_d2d_from_pdf keyed by file identity, so a re-run only
+# re-reads PDFs that were added or changed since the last one. Each entry
+# records the detector (D2D_DETECTOR) that produced it; entries from a
+# different one are ignored and rescanned.
+D2D_CACHE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS d2d_cache (
+        path TEXT PRIMARY KEY,
+        mtime_ns INTEGER,
+        size INTEGER,
+        is_d2d INTEGER,
+        d2d_type TEXT,
+        detector TEXT
+    )
+"""
+
+
+def ensure_d2d_cache(conn: sqlite3.Connection) -> None:
+    # A d2d_cache from before the detector column is only a cache: start over
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(d2d_cache)")]
+    with conn:
+        if columns and "detector" not in columns:
+            conn.execute("DROP TABLE d2d_cache")
+        conn.execute(D2D_CACHE_SCHEMA)
+
+
+def pdf_cache_key(pdf_path: str) -> tuple[str, int | None, int | None]:
+    """
+    (absolute path, mtime_ns, size). If the file cannot be stat'ed, mtime_ns
+    and size are None: that never matches a cache entry and is not stored.
+    """
+    path = os.path.abspath(pdf_path)
+    try:
+        st = os.stat(pdf_path)
+    except OSError:
+        return path, None, None
+    return path, st.st_mtime_ns, st.st_size
+
+# Every D2D marker the old substring checks looked for, in one pattern.
+# Only the leading "D" is consumed, the rest is a lookahead, so overlapping
+# markers are all seen (like `in`) and a full match is only tried where a
+# "D" occurs. Case-insensitive, so page text is scanned as extracted
+# rather than through an upper-cased copy. Only "D2D" / "D 2 D" carry a
+# type suffix.
+D2D_RE = re.compile(
+    r"D(?=(?:2D| 2 D)(?: (OBSOLETE|GUARANTEED|BACKORDER))?|-2-D)", re.IGNORECASE
+)
+D2D_TYPES = {"OBSOLETE": "OBSOLETE", "GUARANTEED": "GUARANTEED_INV", "BACKORDER": "BACKORDER"}
+# Tail of the previous page rescanned with the next one, so a marker
+# split across a page break still matches (pages were joined with " ").
+D2D_CARRY = len("D 2 D GUARANTEED") - 1
+
+# Bump when detection changes in a way the pattern does not show (page
+# handling, type priority, ...); d2d_cache entries are tied to this id.
+D2D_DETECT_VERSION = 1
+D2D_DETECTOR = hashlib.sha1(
+    f"{D2D_DETECT_VERSION}|{D2D_RE.pattern}|{D2D_RE.flags}|{sorted(D2D_TYPES.items())}".encode()
+).hexdigest()[:16]
+
+def _scan_d2d(pdf_path: str) -> tuple[bool, str | None]:
+    """detect_d2d_from_pdf without the error handling: read errors raise."""
+    reader = PdfReader(pdf_path)
+    is_d2d = False
+    found = set()
+    carry = ""
+
+    # Pages are read lazily; stop once the highest-priority type is known
+    for page in reader.pages:
+        text = carry + " " + (page.extract_text() or "")
+        for m in D2D_RE.finditer(text):
+            is_d2d = True
+            if m.group(1):
+                found.add(m.group(1).upper())
+        if "OBSOLETE" in found:
+            break
+        carry = text[-D2D_CARRY:]
+    
+    d2d_type = None
+    if is_d2d:
+        for marker in ("OBSOLETE", "GUARANTEED", "BACKORDER"):
+            if marker in found:
+                d2d_type = D2D_TYPES[marker]
+                break
+    
+    return is_d2d, d2d_type
 
 def detect_d2d_from_pdf(pdf_path: str) -> tuple[bool, str | None]:
     """Check PDF for D2D indicators and return (is_d2d, d2d_type)."""
@@ -22,101 +120,184 @@ def detect_d2d_from_pdf(pdf_path: str) -> tuple[bool, str | None]:
         return False, None
     
     try:
-        reader = PdfReader(pdf_path)
-        combined_text = " ".join([p.extract_text() or "" for p in reader.pages]).upper()
-        
-        is_d2d = "D2D" in combined_text or "D 2 D" in combined_text or "D-2-D" in combined_text
-        d2d_type = None
-        
-        if is_d2d:
-            if "D2D OBSOLETE" in combined_text or "D 2 D OBSOLETE" in combined_text:
-                d2d_type = "OBSOLETE"
-            elif "D2D GUARANTEED" in combined_text or "D 2 D GUARANTEED" in combined_text:
-                d2d_type = "GUARANTEED_INV"
-            elif "D2D BACKORDER" in combined_text or "D 2 D BACKORDER" in combined_text:
-                d2d_type = "BACKORDER"
-        
-        return is_d2d, d2d_type
+        return _scan_d2d(pdf_path)
     except Exception as e:
         print(f"Error reading {pdf_path}: {e}")
         return False, None
 
-def main():
-    with Session(engine) as session:
-        # Get all invoices
-        invoices = session.exec(select(Invoice)).all()
-        
-        print(f"Checking {len(invoices)} invoice(s) for D2D indicators...")
-        print("=" * 60)
-        
-        updated_count = 0
-        for inv in invoices:
-            if not inv.pdf_path:
-                continue
-            
-            # Try to find the PDF - check multiple locations
-            pdf_paths_to_try = [
-                Path(inv.pdf_path),
-                Path(".") / inv.pdf_path,
-            ]
-            
-            # For FCA invoices, try to find individual split PDFs
-            # Normalize invoice number for filename matching
-            safe_inv_num = inv.invoice_number.replace(" ", "_").replace("/", "_")
-            out_dir = Path("out_invoices")
-            if out_dir.exists():
-                # Try exact match first
-                pdf_paths_to_try.extend([
-                    out_dir / f"FCA_{safe_inv_num}.pdf",
-                    out_dir / f"FCA_{safe_inv_num}_MAPLE_RIDGE.pdf",
-                ])
-                
-                # Try pattern matching - look for PDFs containing the invoice number
-                # Remove spaces and try matching
-                inv_num_clean = inv.invoice_number.replace(" ", "").replace("/", "")
-                for pdf_file in out_dir.glob("FCA_*.pdf"):
-                    pdf_name_upper = pdf_file.name.upper()
-                    inv_num_upper = inv_num_clean.upper()
-                    if inv_num_upper in pdf_name_upper:
-                        pdf_paths_to_try.append(pdf_file)
-                        break
-            
-            pdf_path = None
-            for path in pdf_paths_to_try:
-                if path.exists():
-                    pdf_path = path
-                    break
-            
-            if not pdf_path:
-                continue
-            
-            is_d2d, d2d_type = detect_d2d_from_pdf(str(pdf_path))
-            
-            # Update if needed
-            needs_update = False
-            if is_d2d:
-                if not inv.is_d2d:
-                    needs_update = True
-                    print(f"Updating Invoice {inv.id} ({inv.invoice_number}): Setting is_d2d=True, d2d_type={d2d_type}")
-                elif inv.d2d_type != d2d_type:
-                    needs_update = True
-                    print(f"Updating Invoice {inv.id} ({inv.invoice_number}): Changing d2d_type from {inv.d2d_type} to {d2d_type}")
-            
-            if needs_update:
-                inv.is_d2d = True
-                inv.d2d_type = d2d_type
-                session.add(inv)
-                updated_count += 1
-            elif not is_d2d and inv.is_d2d:
-                # Clear D2D flag if it was incorrectly set
-                print(f"Clearing D2D flag for Invoice {inv.id} ({inv.invoice_number})")
-                inv.is_d2d = False
-                inv.d2d_type = None
-                session.add(inv)
-                updated_count += 1
+def _scan_for_cache(pdf_path: str) -> tuple[tuple[bool, str | None], bool]:
+    """
+    detect_d2d_from_pdf plus whether the scan succeeded. A failed read
+    (locked file, permissions, ...) still counts as "not D2D" for this run
+    but must not be cached.
+    """
+    try:
+        return _scan_d2d(pdf_path), True
+    except Exception as e:
+        print(f"Error reading {pdf_path}: {e}")
+        return (False, None), False
+
+# Invoice number -> split-FCA file name part / FCA_*.pdf search key
+_SAFE_INV_NUM = str.maketrans({" ": "_", "/": "_"})
+_CLEAN_INV_NUM = str.maketrans("", "", " /")
+
+class FcaPdfIndex:
+    """
+    One listing of out_dir's FCA_*.pdf files, searched by substring.
+
+    Upper-cased names are joined with newlines so a lookup is a single
+    str.find; the match offset maps back to its file with bisect. The
+    first file (in listing order) containing the key wins, as with the
+    old per-invoice glob loop.
+    """
+
+    def __init__(self, out_dir: Path) -> None:
+        self.paths = list(out_dir.glob("FCA_*.pdf"))
+        names = [p.name.upper() for p in self.paths]
+        self.starts = []
+        pos = 0
+        for name in names:
+            self.starts.append(pos)
+            pos += len(name) + 1
+        self.names = "\n".join(names)
+
+    def find(self, key: str) -> Path | None:
+        if not self.paths or "\n" in key:
+            return None
+        i = self.names.find(key)
+        if i == -1:
+            return None
+        return self.paths[bisect_right(self.starts, i) - 1]
+
+def find_invoice_pdf(inv: InvoiceFlags, fca_index: FcaPdfIndex | None) -> Path | None:
+    """
+    Locate an invoice's PDF on disk (stored path or split FCA output).
+    fca_index is None when out_invoices/ does not exist.
+    """
+    # Try to find the PDF - check multiple locations
+    pdf_paths_to_try = [
+        Path(inv.pdf_path),
+        Path(".") / inv.pdf_path,
+    ]
+    
+    # For FCA invoices, try to find individual split PDFs
+    # Normalize invoice number for filename matching
+    safe_inv_num = inv.invoice_number.translate(_SAFE_INV_NUM)
+    out_dir = Path("out_invoices")
+    if fca_index is not None:
+        # Try exact match first
+        pdf_paths_to_try.extend([
+            out_dir / f"FCA_{safe_inv_num}.pdf",
+            out_dir / f"FCA_{safe_inv_num}_MAPLE_RIDGE.pdf",
+        ])
         
-        session.commit()
-        print(f"\n✓ Updated {updated_count} invoice(s)")
+        # Try pattern matching - look for PDFs containing the invoice number
+        # Remove spaces and try matching
+        inv_num_clean = inv.invoice_number.translate(_CLEAN_INV_NUM)
+        pdf_file = fca_index.find(inv_num_clean.upper())
+        if pdf_file:
+            pdf_paths_to_try.append(pdf_file)
+    
+    for path in pdf_paths_to_try:
+        if path.exists():
+            return path
+    return None
+
+def main():
+    ap = argparse.ArgumentParser(description="Re-check invoice PDFs for D2D markers.")
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes for PDF scanning (default: CPU count; 1 disables).",
+    )
+    ap.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-scan every PDF, ignoring (but refreshing) the d2d_cache table.",
+    )
+    args = ap.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+
+    conn = sqlite3.connect(DATABASE_PATH)
+    ensure_d2d_cache(conn)
+    cur = conn.cursor()
+    cur.row_factory = lambda cur, row: InvoiceFlags(*row)
+
+    # Get all invoices
+    invoices = cur.execute(
+        "SELECT id, invoice_number, pdf_path, is_d2d, d2d_type FROM invoice"
+    ).fetchall()
+    
+    print(f"Checking {len(invoices)} invoice(s) for D2D indicators...")
+    print("=" * 60)
+    
+    # Resolve every PDF first, then scan them in parallel: text
+    # extraction is CPU bound and is nearly all of the runtime.
+    # out_invoices/ is listed once, not once per invoice
+    out_dir = Path("out_invoices")
+    fca_index = FcaPdfIndex(out_dir) if out_dir.exists() else None
+
+    to_scan = []
+    for inv in invoices:
+        if not inv.pdf_path:
+            continue
+        pdf_path = find_invoice_pdf(inv, fca_index)
+        if pdf_path:
+            to_scan.append((inv, str(pdf_path)))
+    
+    # Only PDFs not seen before with the same mtime and size are read
+    cached = {}
+    if not args.no_cache:
+        for path, mtime_ns, size, is_d2d, d2d_type in conn.execute(
+            "SELECT path, mtime_ns, size, is_d2d, d2d_type FROM d2d_cache WHERE detector = ?",
+            (D2D_DETECTOR,),
+        ):
+            cached[path, mtime_ns, size] = (bool(is_d2d), d2d_type)
+    keys = [pdf_cache_key(pdf_path) for _, pdf_path in to_scan]
+    misses = {}
+    for key, (_, pdf_path) in zip(keys, to_scan):
+        if key not in cached:
+            misses.setdefault(key, pdf_path)
+    if len(misses) < len(keys):
+        print(f"Scanning {len(misses)} PDF(s); {len(keys) - len(misses)} unchanged since the last run")
+    
+    paths = list(misses.values())
+    if workers <= 1 or len(paths) < 2:
+        scanned = list(map(_scan_for_cache, paths))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as ex:
+            scanned = list(ex.map(_scan_for_cache, paths, chunksize=8))
+    # Only successful scans of files we could stat are written back
+    new_entries = []
+    for key, (result, ok) in zip(misses, scanned):
+        cached[key] = result
+        if ok and key[1] is not None:
+            new_entries.append((*key, *result, D2D_DETECTOR))
+    results = [cached[key] for key in keys]
+    
+    # (is_d2d, d2d_type, id) for rows whose flags actually change
+    updates = []
+    for (inv, _), (is_d2d, d2d_type) in zip(to_scan, results):
+        if is_d2d:
+            if not inv.is_d2d:
+                print(f"Updating Invoice {inv.id} ({inv.invoice_number}): Setting is_d2d=True, d2d_type={d2d_type}")
+                updates.append((True, d2d_type, inv.id))
+            elif inv.d2d_type != d2d_type:
+                print(f"Updating Invoice {inv.id} ({inv.invoice_number}): Changing d2d_type from {inv.d2d_type} to {d2d_type}")
+                updates.append((True, d2d_type, inv.id))
+        elif inv.is_d2d:
+            # Clear D2D flag if it was incorrectly set
+            print(f"Clearing D2D flag for Invoice {inv.id} ({inv.invoice_number})")
+            updates.append((False, None, inv.id))
+    
+    # One prepared UPDATE for all changed rows, in a single transaction
+    # with the newly scanned cache entries
+    with conn:
+        conn.executemany("UPDATE invoice SET is_d2d = ?, d2d_type = ? WHERE id = ?", updates)
+        conn.executemany("INSERT OR REPLACE INTO d2d_cache VALUES (?, ?, ?, ?, ?, ?)", new_entries)
+    conn.close()
+    print(f"\n✓ Updated {len(updates)} invoice(s)")
 
 if __name__ == "__main__":
     main()